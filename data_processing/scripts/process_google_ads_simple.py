@@ -4,24 +4,25 @@ Stores 100% of original data plus processed metadata
 Fast and simple - no embedding generation needed
 """
 
-import os
+import sys
+import csv
 import pandas as pd
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import pyarrow as pa
+from pyarrow import csv as pacsv
 from pathlib import Path
-import json
+import orjson
 from typing import List, Dict
-import time
 
-# Load environment variables
-load_dotenv()
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
 
-# Configuration
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+from utils.env import get_env, get_supabase
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Rows sent per ingest_google_ads_documents() call
+BATCH_SIZE = 500
+
+# orjson writes the row dicts (and any NaN) as plain JSON
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
 
 
 class GoogleAdsSimpleProcessor:
@@ -32,19 +33,35 @@ class GoogleAdsSimpleProcessor:
     
     def __init__(self, data_folder: str):
         self.data_folder = Path(data_folder)
+        self._pending = []
+        # Rows each file has in the pending batch, in queue order: [file name, rows]
+        self._pending_files = []
+        # Per file [successful, failed], credited as the shared batches are written
+        self.file_counts = {}
         
     def read_csv_file(self, file_path: Path) -> tuple:
-        """Read CSV file and extract all information"""
+        """Open CSV file as a stream of Arrow record batches and extract header info"""
         try:
-            # Read first two lines for header info
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with open(file_path, 'r', encoding='utf-8', newline='') as f:
+                # Read first two lines for header info, then the column names
                 title = f.readline().strip()
                 date_range = f.readline().strip()
+                columns = next(csv.reader(f))
             
-            # Read actual data
-            df = pd.read_csv(file_path, skiprows=2)
+            # Stream the data in ~1 MB batches so memory stays flat for any file size.
+            # Every column is kept (raw_data preserves the full original row) and read
+            # as text: the streaming reader infers types from the first block only and
+            # would fail on a later "1,234" value; clean_numeric_value() parses them.
+            reader = pacsv.open_csv(
+                file_path,
+                read_options=pacsv.ReadOptions(skip_rows=2, block_size=1 << 20),
+                convert_options=pacsv.ConvertOptions(
+                    column_types={name: pa.string() for name in columns},
+                    strings_can_be_null=True
+                )
+            )
             
-            return df, title, date_range
+            return reader, title, date_range
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
             return None, None, None
@@ -63,19 +80,16 @@ class GoogleAdsSimpleProcessor:
                 return value
         return value
     
-    def process_performance_row(self, row: pd.Series, file_name: str, title: str, date_range: str) -> Dict:
+    def process_performance_row(self, row: Dict, file_name: str, title: str, date_range: str,
+                                period: str, year: str, month: str) -> Dict:
         """Process performance row with zero data loss"""
         
-        # Extract period from filename
-        period = file_name.replace("google_ads_performance_", "").replace(".csv", "")
-        year, month = period.split("_")
-        
         # Store raw original data (100% preservation)
         raw_data = {
             'source_file': file_name,
             'report_title': title,
             'report_date_range': date_range,
-            'original_row': row.to_dict()
+            'original_row': row
         }
         
         # Extract and clean values
@@ -144,25 +158,24 @@ Period: {month}/{year}
 File: {file_name}
 """
         
+        # Return the insert row directly (metadata/raw_data stay JSON-encoded)
         return {
-            'text': text_content.strip(),
-            'metadata': metadata,
-            'raw_data': raw_data
+            'content': text_content.strip(),
+            'metadata': orjson.dumps(metadata, option=JSON_OPTIONS).decode(),
+            'raw_data': orjson.dumps(raw_data, option=JSON_OPTIONS).decode(),
+            'embedding': None
         }
     
-    def process_actions_row(self, row: pd.Series, file_name: str, title: str, date_range: str) -> Dict:
+    def process_actions_row(self, row: Dict, file_name: str, title: str, date_range: str,
+                            period: str, year: str, month: str) -> Dict:
         """Process actions row with zero data loss"""
         
-        # Extract period
-        period = file_name.replace("google_ads_actions_", "").replace(".csv", "")
-        year, month = period.split("_")
-        
         # Store raw original data
         raw_data = {
             'source_file': file_name,
             'report_title': title,
             'report_date_range': date_range,
-            'original_row': row.to_dict()
+            'original_row': row
         }
         
         # Extract values
@@ -202,96 +215,148 @@ Period: {month}/{year}
 File: {file_name}
 """
         
+        # Return the insert row directly (metadata/raw_data stay JSON-encoded)
         return {
-            'text': text_content.strip(),
-            'metadata': metadata,
-            'raw_data': raw_data
+            'content': text_content.strip(),
+            'metadata': orjson.dumps(metadata, option=JSON_OPTIONS).decode(),
+            'raw_data': orjson.dumps(raw_data, option=JSON_OPTIONS).decode(),
+            'embedding': None
         }
     
-    def store_in_supabase(self, chunk: Dict) -> bool:
-        """Store document directly in Supabase (no embedding)"""
+    def store_in_supabase(self, document: Dict, file_name: str):
+        """
+        Queue document for Supabase (no embedding), flushing when the batch is full
+        Batches are shared across files, so small exports don't each cost a request
+        """
+        self._pending.append(document)
+        if self._pending_files and self._pending_files[-1][0] == file_name:
+            self._pending_files[-1][1] += 1
+        else:
+            self._pending_files.append([file_name, 1])
+        
+        if len(self._pending) >= BATCH_SIZE:
+            self._flush()
+    
+    def _flush(self):
+        """
+        Upsert all queued documents with one set-based RPC call (existing rows are updated)
+        and credit each file with the outcome for its rows in the batch
+        """
+        if not self._pending:
+            return
+        
+        batch, self._pending = self._pending, []
+        files, self._pending_files = self._pending_files, []
         try:
-            data = {
-                'content': chunk['text'],
-                'metadata': json.dumps(chunk['metadata']),
-                'raw_data': json.dumps(chunk['raw_data']),
-                'embedding': None  # No embedding for now
-            }
-            
-            result = supabase.table('google_ads_documents').insert(data).execute()
-            return True
+            get_supabase().rpc('ingest_google_ads_documents', {'payload': batch}).execute()
+            outcome = 0
         except Exception as e:
-            print(f"Error storing in Supabase: {e}")
-            return False
+            print(f"Error storing batch in Supabase: {e}")
+            outcome = 1
+        
+        for file_name, rows in files:
+            self.file_counts[file_name][outcome] += rows
     
     def process_performance_file(self, file_path: Path):
-        """Process performance file"""
+        """Process performance file (its counts are in file_counts once every batch is written)"""
         print(f"\n{'='*60}")
         print(f"Processing: {file_path.name}")
         print(f"{'='*60}")
         
-        df, title, date_range = self.read_csv_file(file_path)
+        reader, title, date_range = self.read_csv_file(file_path)
         
-        if df is None:
+        if reader is None:
             print("  ✗ Failed to read file")
-            return 0, 0
+            return
         
-        print(f"  Found {len(df)} rows")
+        # Extract period from filename once for the whole file
+        period = file_path.name.replace("google_ads_performance_", "").replace(".csv", "")
+        year, month = period.split("_")
         
-        successful = 0
-        failed = 0
+        self.file_counts[file_path.name] = [0, 0]
+        read = 0
+        rows = 0
+        error = None
         
-        for idx, row in df.iterrows():
-            # Process row
-            chunk = self.process_performance_row(row, file_path.name, title, date_range)
-            
-            # Show progress every 10 rows
-            if (idx + 1) % 10 == 0:
-                print(f"  Processing row {idx + 1}/{len(df)}...")
-            
-            # Store directly (no embedding)
-            if self.store_in_supabase(chunk):
-                successful += 1
-            else:
-                failed += 1
-            
-            # Small delay to avoid overwhelming the API
-            time.sleep(0.1)
+        try:
+            for record_batch in reader:
+                read += record_batch.num_rows
+                # Plain dicts straight from Arrow (no per-row pandas Series)
+                for row in record_batch.to_pylist():
+                    rows += 1
+                    
+                    # Process row
+                    document = self.process_performance_row(
+                        row, file_path.name, title, date_range, period, year, month
+                    )
+                    
+                    # Show progress every 10 rows
+                    if rows % 10 == 0:
+                        print(f"  Processing row {rows}...")
+                    
+                    # Queue for batched insert (no embedding)
+                    self.store_in_supabase(document, file_path.name)
+        except Exception as e:
+            # A bad chunk later in the file: keep the rows already read
+            # and move on to the next file
+            error = e
         
-        print(f"\n  ✓ Completed: {successful} successful, {failed} failed")
-        return successful, failed
+        if error is not None:
+            # Rows read but never queued count as failed (the rest of the file is skipped)
+            self.file_counts[file_path.name][1] += read - rows
+            print(f"\n  ✗ Error reading {file_path.name} after {read} rows, rest of the file skipped: {error}")
+        
+        # Leftover rows stay queued and share a batch with the next file
+        print(f"\n  ✓ Read {rows} rows ({len(self._pending)} queued for the next batch)")
     
     def process_actions_file(self, file_path: Path):
-        """Process actions file"""
+        """Process actions file (its counts are in file_counts once every batch is written)"""
         print(f"\n{'='*60}")
         print(f"Processing: {file_path.name}")
         print(f"{'='*60}")
         
-        df, title, date_range = self.read_csv_file(file_path)
+        reader, title, date_range = self.read_csv_file(file_path)
         
-        if df is None:
+        if reader is None:
             print("  ✗ Failed to read file")
-            return 0, 0
+            return
         
-        print(f"  Found {len(df)} rows")
+        # Extract period once for the whole file
+        period = file_path.name.replace("google_ads_actions_", "").replace(".csv", "")
+        year, month = period.split("_")
         
-        successful = 0
-        failed = 0
+        self.file_counts[file_path.name] = [0, 0]
+        read = 0
+        rows = 0
+        error = None
         
-        for idx, row in df.iterrows():
-            chunk = self.process_actions_row(row, file_path.name, title, date_range)
-            
-            print(f"  Processing row {idx + 1}/{len(df)}...")
-            
-            if self.store_in_supabase(chunk):
-                successful += 1
-            else:
-                failed += 1
-            
-            time.sleep(0.1)
+        try:
+            for record_batch in reader:
+                read += record_batch.num_rows
+                # Plain dicts straight from Arrow (no per-row pandas Series)
+                for row in record_batch.to_pylist():
+                    rows += 1
+                    document = self.process_actions_row(
+                        row, file_path.name, title, date_range, period, year, month
+                    )
+                    
+                    # Show progress every 10 rows
+                    if rows % 10 == 0:
+                        print(f"  Processing row {rows}...")
+                    
+                    self.store_in_supabase(document, file_path.name)
+        except Exception as e:
+            # A bad chunk later in the file: keep the rows already read
+            # and move on to the next file
+            error = e
         
-        print(f"\n  ✓ Completed: {successful} successful, {failed} failed")
-        return successful, failed
+        if error is not None:
+            # Rows read but never queued count as failed (the rest of the file is skipped)
+            self.file_counts[file_path.name][1] += read - rows
+            print(f"\n  ✗ Error reading {file_path.name} after {read} rows, rest of the file skipped: {error}")
+        
+        # Leftover rows stay queued and share a batch with the next file
+        print(f"\n  ✓ Read {rows} rows ({len(self._pending)} queued for the next batch)")
     
     def process_all_files(self):
         """Process all files"""
@@ -303,26 +368,32 @@ File: {file_name}
         print(f"\nFound {len(performance_files)} performance files and {len(action_files)} action files")
         print("\n⚡ FAST MODE: No embeddings - just storing data directly")
         
-        total_successful = 0
-        total_failed = 0
-        
         # Process performance files
         print("\n" + "="*70)
         print("PROCESSING PERFORMANCE FILES")
         print("="*70)
         for file_path in performance_files:
-            successful, failed = self.process_performance_file(file_path)
-            total_successful += successful
-            total_failed += failed
+            self.process_performance_file(file_path)
         
         # Process action files
         print("\n" + "="*70)
         print("PROCESSING ACTION FILES")
         print("="*70)
         for file_path in action_files:
-            successful, failed = self.process_actions_file(file_path)
-            total_successful += successful
-            total_failed += failed
+            self.process_actions_file(file_path)
+        
+        # One final write for whatever is still queued across all files
+        self._flush()
+        
+        print("\n" + "="*70)
+        print("RESULTS PER FILE")
+        print("="*70)
+        for file_name, (successful, failed) in self.file_counts.items():
+            status = "✓" if not failed else "✗"
+            print(f"  {status} {file_name}: {successful} successful, {failed} failed")
+        
+        total_successful = sum(successful for successful, _ in self.file_counts.values())
+        total_failed = sum(failed for _, failed in self.file_counts.values())
         
         print("\n" + "="*70)
         print("PROCESSING COMPLETE")
@@ -335,6 +406,7 @@ File: {file_name}
         print(f"  ✓ Processed metadata")
         print(f"  ✓ Text content")
         print(f"  ⏭️  Embeddings skipped (can add later)")
+        print(f"  ✓ Safe to re-run - rows already stored are updated")
 
 
 def main():
@@ -345,7 +417,8 @@ def main():
     print("="*70)
     
     # Validate environment
-    if not all([SUPABASE_URL, SUPABASE_KEY]):
+    env = get_env()
+    if not all([env['SUPABASE_URL'], env['SUPABASE_KEY']]):
         print("\n❌ Error: Missing environment variables!")
         print("Please ensure .env file contains:")
         print("  - SUPABASE_URL")
@@ -4,27 +4,55 @@ Stores 100% of original data plus processed metadata
 Every property, every value, every column is preserved
 """
 
-import os
+import sys
+import functools
 import pandas as pd
+import numpy as np
 import google.generativeai as genai
-from supabase import create_client, Client
-from dotenv import load_dotenv
 from pathlib import Path
-import json
+import orjson
+import hashlib
+import sqlite3
 from typing import List, Dict
-import time
+from concurrent.futures import Future, ThreadPoolExecutor
 
-# Load environment variables
-load_dotenv()
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
 
-# Configuration
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+from utils.env import get_env, get_supabase
+from utils.retry import RateLimiter, with_backoff
 
-# Initialize clients
-genai.configure(api_key=GOOGLE_API_KEY)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Rows embedded per Gemini request (and inserted per Supabase request)
+EMBED_BATCH_SIZE = 50
+
+# Rows parsed at a time, so large exports never sit in memory all at once
+CHUNK_SIZE = 10_000
+
+# Numeric CSV columns of each export type (cleaned for the whole chunk at once)
+PERFORMANCE_METRICS = ['Cost', 'Impr.', 'Clicks', 'CTR', 'Avg. CPC', 'Conversions', 'Conv. rate']
+ACTIONS_METRICS = ['Conversions']
+
+# orjson handles any NumPy scalars in the row dicts and writes NaN as null
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+@functools.lru_cache(maxsize=1)
+def get_genai():
+    """Configure Gemini on first use instead of at import time"""
+    genai.configure(api_key=get_env()['GOOGLE_API_KEY'])
+    return genai
+
+
+@functools.lru_cache(maxsize=1)
+def get_gemini_limiter():
+    """
+    Token bucket sized to 90% of GEMINI_REQUESTS_PER_MINUTE, so we only wait
+    when the budget is used up (None when unset)
+    """
+    requests_per_minute = get_env()['GEMINI_REQUESTS_PER_MINUTE']
+    if requests_per_minute <= 0:
+        return None
+    return RateLimiter(requests_per_minute * 0.9 / 60)
 
 
 class GoogleAdsZeroLossProcessor:
@@ -40,47 +68,48 @@ class GoogleAdsZeroLossProcessor:
     def __init__(self, data_folder: str):
         self.data_folder = Path(data_folder)
         self.embedding_model = "models/embedding-001"
+        # Local cache of embeddings already generated, so re-runs skip the Gemini calls
+        self.embedding_cache = sqlite3.connect(get_env()['EMBEDDING_CACHE_PATH'])
+        self.embedding_cache.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, emb BLOB)"
+        )
         
     def read_csv_file(self, file_path: Path) -> tuple:
-        """Read CSV file and extract all information"""
+        """Open CSV file as an iterator of DataFrame chunks and extract header info"""
         try:
             # Read first two lines for header info
             with open(file_path, 'r', encoding='utf-8') as f:
                 title = f.readline().strip()
                 date_range = f.readline().strip()
             
-            # Read actual data
-            df = pd.read_csv(file_path, skiprows=2)
+            # Read actual data in chunks
+            reader = pd.read_csv(file_path, skiprows=2, chunksize=CHUNK_SIZE)
             
-            return df, title, date_range
+            return reader, title, date_range
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
             return None, None, None
     
-    def clean_numeric_value(self, value):
-        """Clean numeric values for processing"""
-        if pd.isna(value):
-            return None
-        if isinstance(value, str):
-            value = value.replace(',', '')
-            if '%' in value:
-                return float(value.replace('%', ''))
-            try:
-                return float(value)
-            except:
-                return value
-        return value
+    def clean_numeric_columns(self, df: pd.DataFrame, columns: List[str]) -> List[Dict]:
+        """
+        Clean numeric columns for a whole chunk at once (thousands separators, % signs)
+        Returns one dict of cleaned values per row; blanks become None
+        """
+        cleaned = pd.DataFrame(index=df.index)
+        for column in columns:
+            if column in df.columns:
+                text = df[column].astype('string').str.replace(',', '', regex=False).str.rstrip('%')
+                cleaned[column] = pd.to_numeric(text, errors='coerce')
+        
+        return cleaned.astype(object).where(cleaned.notna(), None).to_dict(orient='records')
     
-    def process_performance_row(self, row: pd.Series, file_name: str, title: str, date_range: str) -> Dict:
+    def process_performance_row(self, row: Dict, metrics: Dict, file_name: str, title: str, date_range: str,
+                                period: str, year: str, month: str) -> Dict:
         """
         Process performance row with ZERO data loss
         Stores both RAW original data and processed metadata
         """
         
-        # Extract period from filename
-        period = file_name.replace("google_ads_performance_", "").replace(".csv", "")
-        year, month = period.split("_")
-        
         # ==============================================================
         # PART 1: STORE RAW ORIGINAL DATA (100% PRESERVATION)
         # ==============================================================
@@ -88,14 +117,14 @@ class GoogleAdsZeroLossProcessor:
             'source_file': file_name,
             'report_title': title,
             'report_date_range': date_range,
-            'original_row': row.to_dict()  # Store EVERYTHING as-is
+            'original_row': row  # Store EVERYTHING as-is
         }
         
         # ==============================================================
         # PART 2: CREATE PROCESSED METADATA (for efficient querying)
         # ==============================================================
         
-        # Extract and clean values
+        # Extract values (metrics were already cleaned for the whole chunk)
         day = str(row.get('Day', ''))
         campaign = str(row.get('Campaign', ''))
         campaign_type = str(row.get('Campaign type', ''))
@@ -103,13 +132,13 @@ class GoogleAdsZeroLossProcessor:
         landing_page = str(row.get('Landing page', ''))
         currency_code = str(row.get('Currency code', ''))
         
-        cost = self.clean_numeric_value(row.get('Cost', 0))
-        impressions = self.clean_numeric_value(row.get('Impr.', 0))
-        clicks = self.clean_numeric_value(row.get('Clicks', 0))
-        ctr = self.clean_numeric_value(row.get('CTR', 0))
-        avg_cpc = self.clean_numeric_value(row.get('Avg. CPC', 0))
-        conversions = self.clean_numeric_value(row.get('Conversions', 0))
-        conv_rate = self.clean_numeric_value(row.get('Conv. rate', 0))
+        cost = metrics.get('Cost', 0)
+        impressions = metrics.get('Impr.', 0)
+        clicks = metrics.get('Clicks', 0)
+        ctr = metrics.get('CTR', 0)
+        avg_cpc = metrics.get('Avg. CPC', 0)
+        conversions = metrics.get('Conversions', 0)
+        conv_rate = metrics.get('Conv. rate', 0)
         
         # Create processed metadata
         metadata = {
@@ -174,15 +203,12 @@ File: {file_name}
             'raw_data': raw_data  # Original data preserved
         }
     
-    def process_actions_row(self, row: pd.Series, file_name: str, title: str, date_range: str) -> Dict:
+    def process_actions_row(self, row: Dict, metrics: Dict, file_name: str, title: str, date_range: str,
+                            period: str, year: str, month: str) -> Dict:
         """
         Process actions row with ZERO data loss
         """
         
-        # Extract period
-        period = file_name.replace("google_ads_actions_", "").replace(".csv", "")
-        year, month = period.split("_")
-        
         # ==============================================================
         # PART 1: STORE RAW ORIGINAL DATA
         # ==============================================================
@@ -190,7 +216,7 @@ File: {file_name}
             'source_file': file_name,
             'report_title': title,
             'report_date_range': date_range,
-            'original_row': row.to_dict()  # 100% preservation
+            'original_row': row  # 100% preservation
         }
         
         # ==============================================================
@@ -200,7 +226,7 @@ File: {file_name}
         campaign = str(row.get('Campaign', ''))
         ad_group = str(row.get('Ad group', ''))
         conversion_action = str(row.get('Conversion action', ''))
-        conversions = self.clean_numeric_value(row.get('Conversions', 0))
+        conversions = metrics.get('Conversions', 0)
         
         metadata = {
             'source_type': 'google_ads_actions',
@@ -239,85 +265,165 @@ File: {file_name}
             'raw_data': raw_data
         }
     
-    def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding using Google Gemini"""
+    def embedding_key(self, text: str) -> str:
+        """Cache key for a text (the model is included so switching models never reuses stale vectors)"""
+        return hashlib.sha1(f"{self.embedding_model}\n{text}".encode()).hexdigest()
+    
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of texts, only asking Gemini for ones not cached yet"""
+        keys = [self.embedding_key(text) for text in texts]
+        
+        placeholders = ','.join('?' * len(keys))
+        cached = {
+            key: np.frombuffer(emb, dtype=np.float32).tolist()
+            for key, emb in self.embedding_cache.execute(
+                f"SELECT hash, emb FROM embeddings WHERE hash IN ({placeholders})", keys
+            )
+        }
+        
+        # Unique texts still missing (identical rows are only embedded once)
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        if missing:
+            embeddings = self.request_embeddings(list(missing.values()))
+            fresh = {key: embedding for key, embedding in zip(missing, embeddings) if embedding}
+            
+            with self.embedding_cache:
+                self.embedding_cache.executemany(
+                    "INSERT OR REPLACE INTO embeddings (hash, emb) VALUES (?, ?)",
+                    [(key, np.asarray(embedding, dtype=np.float32).tobytes()) for key, embedding in fresh.items()]
+                )
+            cached.update(fresh)
+        
+        return [cached.get(key) for key in keys]
+    
+    def request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of texts with one Google Gemini request"""
         try:
-            result = genai.embed_content(
-                model=self.embedding_model,
-                content=text,
-                task_type="retrieval_document"
+            result = with_backoff(
+                lambda: get_genai().embed_content(
+                    model=self.embedding_model,
+                    content=texts,
+                    task_type="retrieval_document"
+                ),
+                limiter=get_gemini_limiter()
             )
             return result['embedding']
         except Exception as e:
-            print(f"Error generating embedding: {e}")
-            time.sleep(2)
-            try:
-                result = genai.embed_content(
-                    model=self.embedding_model,
-                    content=text,
-                    task_type="retrieval_document"
-                )
-                return result['embedding']
-            except Exception as e2:
-                print(f"Retry failed: {e2}")
-                return None
+            print(f"Error generating embeddings: {e}")
+            return [None] * len(texts)
     
-    def store_in_pgvector(self, chunk: Dict, embedding: List[float]) -> bool:
-        """Store with ZERO data loss - includes raw_data"""
+    def to_vector_literal(self, embedding: List[float]) -> str:
+        """
+        pgvector text literal with float32 precision ('[0.0144,...]')
+        vector(768) stores float32 anyway, so this is lossless and about half
+        the size of the full-precision JSON floats
+        """
+        return orjson.dumps(np.asarray(embedding, dtype=np.float32), option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    
+    def store_in_pgvector(self, chunks: List[Dict], embeddings: List[List[float]]) -> bool:
+        """Store a batch with ZERO data loss - includes raw_data"""
         try:
-            data = {
-                'content': chunk['text'],
-                'metadata': json.dumps(chunk['metadata']),
-                'raw_data': json.dumps(chunk['raw_data']),  # Original data!
-                'embedding': embedding
-            }
+            data = [
+                {
+                    'content': chunk['text'],
+                    'metadata': orjson.dumps(chunk['metadata'], option=JSON_OPTIONS).decode(),
+                    'raw_data': orjson.dumps(chunk['raw_data'], option=JSON_OPTIONS).decode(),  # Original data!
+                    'embedding': self.to_vector_literal(embedding)
+                }
+                for chunk, embedding in zip(chunks, embeddings)
+            ]
             
-            result = supabase.table('google_ads_documents').insert(data).execute()
+            # Upsert on the natural key (setup SQL), so rows already stored are
+            # updated instead of failing the whole batch with a unique violation
+            get_supabase().rpc('ingest_google_ads_documents', {'payload': data}).execute()
             return True
         except Exception as e:
             print(f"Error storing in PGVector: {e}")
             return False
     
+    def embed_and_store(self, chunks: List[Dict], inserter: ThreadPoolExecutor) -> Future:
+        """
+        Embed a batch of chunks, then hand the insert to the inserter thread
+        so the next batch is embedded while this one is being stored
+        """
+        embeddings = self.generate_embeddings([chunk['text'] for chunk in chunks])
+        return inserter.submit(self.store_embedded, chunks, embeddings)
+    
+    def store_embedded(self, chunks: List[Dict], embeddings: List[List[float]]) -> tuple:
+        """Store the chunks that got an embedding"""
+        embedded = [(chunk, embedding) for chunk, embedding in zip(chunks, embeddings) if embedding]
+        failed = len(chunks) - len(embedded)
+        
+        if not embedded:
+            return 0, failed
+        
+        if self.store_in_pgvector([chunk for chunk, _ in embedded], [embedding for _, embedding in embedded]):
+            return len(embedded), failed
+        return 0, len(chunks)
+    
     def process_performance_file(self, file_path: Path):
         """Process performance file"""
         print(f"\n{'='*60}")
         print(f"Processing: {file_path.name}")
         print(f"{'='*60}")
         
-        df, title, date_range = self.read_csv_file(file_path)
+        reader, title, date_range = self.read_csv_file(file_path)
         
-        if df is None:
+        if reader is None:
             print("  ✗ Failed to read file")
             return 0, 0
         
-        print(f"  Found {len(df)} rows - preserving 100% of data")
+        print(f"  Reading in chunks of {CHUNK_SIZE:,} rows - preserving 100% of data")
         
-        successful = 0
-        failed = 0
+        # Extract period from filename once for the whole file
+        period = file_path.name.replace("google_ads_performance_", "").replace(".csv", "")
+        year, month = period.split("_")
         
-        for idx, row in df.iterrows():
-            # Process row (with raw data preservation)
-            chunk = self.process_performance_row(row, file_path.name, title, date_range)
-            
-            # Show progress
-            if (idx + 1) % 10 == 0:
-                print(f"  Processing row {idx + 1}/{len(df)}...")
-            
-            # Generate embedding
-            embedding = self.generate_embedding(chunk['text'])
-            
-            if embedding:
-                if self.store_in_pgvector(chunk, embedding):
-                    successful += 1
-                else:
-                    failed += 1
-            else:
-                failed += 1
-            
-            # Rate limiting
-            time.sleep(0.5)
+        chunks = []
+        stored = []
+        read = 0
+        rows = 0
+        error = None
         
-        print(f"\n  ✓ Completed: {successful} successful, {failed} failed")
+        with reader, ThreadPoolExecutor(max_workers=1) as inserter:
+            try:
+                for df in reader:
+                    read += len(df)
+                    # Convert the chunk to dicts at once (original_row keeps every column)
+                    rows_metrics = zip(df.to_dict(orient='records'), self.clean_numeric_columns(df, PERFORMANCE_METRICS))
+                    for row, metrics in rows_metrics:
+                        rows += 1
+                        
+                        # Process row (with raw data preservation)
+                        chunks.append(self.process_performance_row(
+                            row, metrics, file_path.name, title, date_range, period, year, month
+                        ))
+                        
+                        # Generate embeddings and store once the batch is full (progress once per batch)
+                        if len(chunks) >= EMBED_BATCH_SIZE:
+                            print(f"  Processing row {rows}...")
+                            stored.append(self.embed_and_store(chunks, inserter))
+                            chunks = []
+                
+                # Remaining rows
+                if chunks:
+                    stored.append(self.embed_and_store(chunks, inserter))
+            except Exception as e:
+                # A bad chunk later in the file: keep the batches already sent
+                # and move on to the next file
+                error = e
+        
+        successful = sum(future.result()[0] for future in stored)
+        failed = sum(future.result()[1] for future in stored)
+        
+        if error is not None:
+            # Rows read but not stored yet count as failed (the rest of the file is skipped)
+            failed += read - successful - failed
+            print(f"\n  ✗ Error reading {file_path.name} after {read} rows, rest of the file skipped: {error}")
+            print(f"  ✗ Partially failed: {successful} successful, {failed} failed")
+            return successful, failed
+        
+        print(f"\n  ✓ Completed {rows} rows: {successful} successful, {failed} failed")
         print(f"  ✓ Raw data preserved: {successful} rows")
         return successful, failed
     
@@ -327,35 +433,59 @@ File: {file_name}
         print(f"Processing: {file_path.name}")
         print(f"{'='*60}")
         
-        df, title, date_range = self.read_csv_file(file_path)
+        reader, title, date_range = self.read_csv_file(file_path)
         
-        if df is None:
+        if reader is None:
             print("  ✗ Failed to read file")
             return 0, 0
         
-        print(f"  Found {len(df)} rows - preserving 100% of data")
+        print(f"  Reading in chunks of {CHUNK_SIZE:,} rows - preserving 100% of data")
         
-        successful = 0
-        failed = 0
+        # Extract period once for the whole file
+        period = file_path.name.replace("google_ads_actions_", "").replace(".csv", "")
+        year, month = period.split("_")
         
-        for idx, row in df.iterrows():
-            chunk = self.process_actions_row(row, file_path.name, title, date_range)
-            
-            print(f"  Processing row {idx + 1}/{len(df)}...")
-            
-            embedding = self.generate_embedding(chunk['text'])
-            
-            if embedding:
-                if self.store_in_pgvector(chunk, embedding):
-                    successful += 1
-                else:
-                    failed += 1
-            else:
-                failed += 1
-            
-            time.sleep(0.5)
+        chunks = []
+        stored = []
+        read = 0
+        rows = 0
+        error = None
         
-        print(f"\n  ✓ Completed: {successful} successful, {failed} failed")
+        with reader, ThreadPoolExecutor(max_workers=1) as inserter:
+            try:
+                for df in reader:
+                    read += len(df)
+                    rows_metrics = zip(df.to_dict(orient='records'), self.clean_numeric_columns(df, ACTIONS_METRICS))
+                    for row, metrics in rows_metrics:
+                        rows += 1
+                        chunks.append(self.process_actions_row(
+                            row, metrics, file_path.name, title, date_range, period, year, month
+                        ))
+                        
+                        # Progress once per batch
+                        if len(chunks) >= EMBED_BATCH_SIZE:
+                            print(f"  Processing row {rows}...")
+                            stored.append(self.embed_and_store(chunks, inserter))
+                            chunks = []
+                
+                if chunks:
+                    stored.append(self.embed_and_store(chunks, inserter))
+            except Exception as e:
+                # A bad chunk later in the file: keep the batches already sent
+                # and move on to the next file
+                error = e
+        
+        successful = sum(future.result()[0] for future in stored)
+        failed = sum(future.result()[1] for future in stored)
+        
+        if error is not None:
+            # Rows read but not stored yet count as failed (the rest of the file is skipped)
+            failed += read - successful - failed
+            print(f"\n  ✗ Error reading {file_path.name} after {read} rows, rest of the file skipped: {error}")
+            print(f"  ✗ Partially failed: {successful} successful, {failed} failed")
+            return successful, failed
+        
+        print(f"\n  ✓ Completed {rows} rows: {successful} successful, {failed} failed")
         print(f"  ✓ Raw data preserved: {successful} rows")
         return successful, failed
     
@@ -417,7 +547,8 @@ def main():
     print("\n➡️  NO DATA IS LOST - EVERYTHING IS PRESERVED")
     
     # Validate environment
-    if not all([SUPABASE_URL, SUPABASE_KEY, GOOGLE_API_KEY]):
+    env = get_env()
+    if not all([env['SUPABASE_URL'], env['SUPABASE_KEY'], env['GOOGLE_API_KEY']]):
         print("\n❌ Error: Missing environment variables!")
         print("Please ensure .env file contains:")
         print("  - SUPABASE_URL")
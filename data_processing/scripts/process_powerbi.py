@@ -4,25 +4,17 @@ Stores data in individual columns (no JSONB, no embeddings)
 All original CSV columns preserved as database columns
 """
 
-import os
+import sys
 import pandas as pd
-from supabase import create_client, Client
-from dotenv import load_dotenv
 from pathlib import Path
 from typing import Dict
-import time
 from datetime import datetime
 import re
 
-# Load environment variables
-load_dotenv()
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
 
-# Configuration
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from utils.env import get_env, get_supabase
 
 
 class PowerBIProcessor:
@@ -146,7 +138,7 @@ File: {file_name}
     def store_data(self, data: Dict) -> bool:
         """Store data in structured table"""
         try:
-            result = supabase.table('powerbi_sales').insert(data).execute()
+            result = get_supabase().table('powerbi_sales').insert(data).execute()
             return True
         except Exception as e:
             print(f"Error storing data: {e}")
@@ -191,9 +183,6 @@ File: {file_name}
                 successful += 1
             else:
                 failed += 1
-            
-            # Small delay to avoid overwhelming the database
-            time.sleep(0.05)
         
         print(f"\n  ✓ Completed: {successful} successful, {failed} failed")
         return successful, failed
@@ -248,7 +237,8 @@ def main():
     print("="*70)
     
     # Validate environment
-    if not all([SUPABASE_URL, SUPABASE_KEY]):
+    env = get_env()
+    if not all([env['SUPABASE_URL'], env['SUPABASE_KEY']]):
         print("\n❌ Error: Missing environment variables!")
         print("Please ensure .env file contains:")
         print("  - SUPABASE_URL")
@@ -4,24 +4,16 @@ Stores 100% of original data plus processed metadata
 Fast and simple - no embedding generation needed
 """
 
-import os
+import sys
 import pandas as pd
-from supabase import create_client, Client
-from dotenv import load_dotenv
 from pathlib import Path
 import json
 from typing import Dict
-import time
 
-# Load environment variables
-load_dotenv()
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
 
-# Configuration
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from utils.env import get_env, get_supabase
 
 
 class TikTokAdsSimpleProcessor:
@@ -188,7 +180,7 @@ File: {file_name}
                 'raw_data': json.dumps(chunk['raw_data'])
             }
             
-            result = supabase.table('tiktok_ads_documents').insert(data).execute()
+            result = get_supabase().table('tiktok_ads_documents').insert(data).execute()
             return True
         except Exception as e:
             print(f"Error storing in Supabase: {e}")
@@ -224,9 +216,6 @@ File: {file_name}
                 successful += 1
             else:
                 failed += 1
-            
-            # Small delay to avoid overwhelming the API
-            time.sleep(0.05)
         
         print(f"\n  ✓ Completed: {successful} successful, {failed} failed")
         return successful, failed
@@ -273,7 +262,8 @@ def main():
     print("="*70)
     
     # Validate environment
-    if not all([SUPABASE_URL, SUPABASE_KEY]):
+    env = get_env()
+    if not all([env['SUPABASE_URL'], env['SUPABASE_KEY']]):
         print("\n❌ Error: Missing environment variables!")
         print("Please ensure .env file contains:")
         print("  - SUPABASE_URL")
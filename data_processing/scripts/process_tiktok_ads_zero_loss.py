@@ -4,27 +4,134 @@ Stores 100% of original data plus processed metadata
 Every property, every value, every column is preserved
 """
 
-import os
+import sys
+import csv
+import functools
+import contextlib
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+from pyarrow import csv as pacsv
 import google.generativeai as genai
-from supabase import create_client, Client
-from dotenv import load_dotenv
 from pathlib import Path
-import json
+import orjson
+import hashlib
+import sqlite3
 from typing import List, Dict
-import time
+from concurrent.futures import Future, ThreadPoolExecutor
 
-# Load environment variables
-load_dotenv()
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
 
-# Configuration
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+from utils.env import get_env, get_supabase
+from utils.retry import RateLimiter, with_backoff
 
-# Initialize clients
-genai.configure(api_key=GOOGLE_API_KEY)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Gemini model used for every embedding (and part of the embedding cache key)
+EMBEDDING_MODEL = "models/embedding-001"
+
+# Rows parsed at a time, so large exports never sit in memory all at once
+CHUNK_SIZE = 5_000
+
+# Exports bigger than this are parsed with pyarrow's multithreaded CSV reader instead,
+# LARGE_FILE_BLOCK_BYTES at a time
+LARGE_FILE_BYTES = 100 << 20
+LARGE_FILE_BLOCK_BYTES = 4 << 20
+
+# Rows embedded per Gemini request (the API accepts up to 100)
+EMBED_BATCH_SIZE = 100
+
+# Rows inserted per Supabase request
+INSERT_BATCH_SIZE = 500
+
+# Numeric CSV columns (cleaned for the whole file at once)
+NUMERIC_COLUMNS = [
+    'Cost', 'CPC (destination)', 'CPM', 'Impressions', 'Clicks (destination)', 'CTR (destination)',
+    'Reach', 'Cost per 1,000 people reached', 'Frequency',
+    'Video views', '2-second video views', '6-second video views', 'Video views at 100%',
+    'Video views at 75%', 'Video views at 50%', 'Video views at 25%',
+    'Average play time per video view', 'Average play time per user'
+]
+
+# Metadata text fields -> CSV column (blank cells and missing columns get the default)
+TEXT_FIELDS = {
+    'day': 'By Day', 'campaign_name': 'Campaign name', 'ad_group_name': 'Ad group name',
+    'ad_name': 'Ad name', 'website_url': 'Website URL (Ad level）', 'currency_code': 'Currency'
+}
+TEXT_DEFAULTS = {'currency_code': 'AUD'}
+
+# Metadata metrics -> numeric CSV column (blanks become 0, counts are truncated to ints)
+FLOAT_FIELDS = {
+    'cost': 'Cost', 'cpc': 'CPC (destination)', 'cpm': 'CPM', 'ctr': 'CTR (destination)',
+    'cost_per_1000_reached': 'Cost per 1,000 people reached', 'frequency': 'Frequency',
+    'avg_play_time_per_view': 'Average play time per video view',
+    'avg_play_time_per_user': 'Average play time per user'
+}
+INTEGER_FIELDS = {
+    'impressions': 'Impressions', 'clicks': 'Clicks (destination)', 'reach': 'Reach',
+    'video_views': 'Video views', 'video_views_2s': '2-second video views',
+    'video_views_6s': '6-second video views', 'video_views_100': 'Video views at 100%',
+    'video_views_75': 'Video views at 75%', 'video_views_50': 'Video views at 50%',
+    'video_views_25': 'Video views at 25%'
+}
+METRIC_FIELDS = [*FLOAT_FIELDS, *INTEGER_FIELDS, 'has_clicks', 'has_video_views', 'completion_rate']
+
+# orjson handles any NumPy scalars in the row dicts and writes NaN as null
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Human-readable text for embeddings, filled per row with format_map
+# (parsed once, instead of a ~25-expression f-string per row)
+TEXT_TEMPLATE = """TikTok Ads Performance Record
+
+Date: {day}
+Campaign: {campaign_name}
+Ad Group: {ad_group_name}
+Ad Name: {ad_name}
+Website URL: {website_url}
+
+Performance Metrics:
+- Cost: {currency_code} {cost}
+- CPM (Cost Per 1000 Impressions): {currency_code} {cpm}
+- CPC (Cost Per Click): {currency_code} {cpc}
+- Impressions: {impressions:,}
+- Clicks: {clicks}
+- Click-Through Rate (CTR): {ctr}%
+- Reach: {reach:,}
+- Cost per 1,000 Reached: {currency_code} {cost_per_1000_reached}
+- Frequency: {frequency}
+
+Video Performance:
+- Total Video Views: {video_views:,}
+- 2-Second Views: {video_views_2s:,}
+- 6-Second Views: {video_views_6s:,}
+- Video Completion Rates:
+  * 25% Completion: {video_views_25:,}
+  * 50% Completion: {video_views_50:,}
+  * 75% Completion: {video_views_75:,}
+  * 100% Completion: {video_views_100:,}
+- Average Play Time Per View: {avg_play_time_per_view}s
+- Average Play Time Per User: {avg_play_time_per_user}s
+
+Period: {month}/{year}
+File: {file_name}"""
+
+# Text columns with few distinct values (read straight into categories, stored once per value)
+CATEGORY_COLUMNS = ['By Day', 'Campaign name', 'Ad group name', 'Ad name', 'Website URL (Ad level）', 'Currency']
+
+
+@functools.lru_cache(maxsize=1)
+def get_genai():
+    """Configure Gemini on first use instead of at import time"""
+    genai.configure(api_key=get_env()['GOOGLE_API_KEY'])
+    return genai
+
+
+@functools.lru_cache(maxsize=1)
+def get_gemini_limiter():
+    """Token bucket sized to 90% of GEMINI_REQUESTS_PER_MINUTE, shared by all embedding threads (None when unset)"""
+    requests_per_minute = get_env()['GEMINI_REQUESTS_PER_MINUTE']
+    if requests_per_minute <= 0:
+        return None
+    return RateLimiter(requests_per_minute * 0.9 / 60)
 
 
 class TikTokAdsZeroLossProcessor:
@@ -39,250 +146,376 @@ class TikTokAdsZeroLossProcessor:
     
     def __init__(self, data_folder: str):
         self.data_folder = Path(data_folder)
-        self.embedding_model = "models/embedding-001"
+        self.embedding_cache = sqlite3.connect(get_env()['EMBEDDING_CACHE_PATH'])
+        self.embedding_cache.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, emb BLOB)"
+        )
         
-    def read_csv_file(self, file_path: Path) -> pd.DataFrame:
-        """Read TikTok CSV file"""
+    def read_csv_file(self, file_path: Path):
+        """Open TikTok CSV file as an iterator of DataFrame chunks"""
         try:
+            size = file_path.stat().st_size
+            if size > LARGE_FILE_BYTES:
+                print(f"  Large file ({size / (1 << 20):,.0f} MB) - parsing with pyarrow "
+                      f"in {LARGE_FILE_BLOCK_BYTES >> 20} MB blocks - preserving 100% of data")
+                return self.read_large_csv_file(file_path)
+            
             # TikTok CSVs have a simple structure - just one header row
-            df = pd.read_csv(file_path)
-            return df
+            print(f"  Reading in chunks of {CHUNK_SIZE:,} rows - preserving 100% of data")
+            return pd.read_csv(
+                file_path,
+                chunksize=CHUNK_SIZE,
+                dtype={column: 'category' for column in CATEGORY_COLUMNS}
+            )
         except Exception as e:
             print(f"Error reading {file_path}: {e}")
             return None
     
-    def clean_numeric_value(self, value):
-        """Clean numeric values for processing"""
-        if pd.isna(value):
-            return None
-        if isinstance(value, str):
-            value = value.replace(',', '')
-            if '%' in value:
-                return float(value.replace('%', ''))
-            try:
-                return float(value)
-            except:
-                return value
-        return value
+    def read_large_csv_file(self, file_path: Path):
+        """
+        Open a large export with pyarrow's streaming reader (multithreaded, releases the GIL)
+        Every column is read as text so later blocks can't disagree with the types
+        inferred from the first one; the header is read and the reader opened here,
+        so errors surface in read_csv_file rather than on the first chunk
+        """
+        with open(file_path, newline='', encoding='utf-8') as f:
+            columns = next(csv.reader(f), None)
+        
+        if not columns:
+            raise ValueError("No columns to parse from file")
+        
+        reader = pacsv.open_csv(
+            file_path,
+            read_options=pacsv.ReadOptions(block_size=LARGE_FILE_BLOCK_BYTES),
+            convert_options=pacsv.ConvertOptions(
+                column_types={column: pa.string() for column in columns},
+                strings_can_be_null=True
+            )
+        )
+        return self.convert_large_batches(reader)
+    
+    def convert_large_batches(self, reader: pacsv.CSVStreamingReader):
+        """Convert each pyarrow block to a DataFrame with the types pandas would give it"""
+        with reader:
+            for batch in reader:
+                df = batch.to_pandas()
+                for column in df.columns:
+                    if column in CATEGORY_COLUMNS:
+                        df[column] = df[column].astype('category')
+                    else:
+                        # Numbers become int64/float64 like pd.read_csv, anything else stays text
+                        try:
+                            df[column] = pd.to_numeric(df[column])
+                        except (ValueError, TypeError):
+                            pass
+                yield df
+    
+    def shrink_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Downcast integer columns (repeating text columns are already categories)
+        Float columns stay float64 so the original values are kept exactly (zero data loss)
+        """
+        for column in df.select_dtypes('integer').columns:
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+        return df
+    
+    def clean_text_columns(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Metadata text fields for a whole chunk as plain strings, one array per field"""
+        texts = {}
+        for field, column in TEXT_FIELDS.items():
+            default = TEXT_DEFAULTS.get(field, '')
+            if column in df.columns:
+                texts[field] = df[column].astype(object).fillna(default).astype(str).to_numpy()
+            else:
+                texts[field] = np.full(len(df), default, dtype=object)
+        return texts
     
-    def process_row(self, row: pd.Series, file_name: str) -> Dict:
+    def clean_numeric_columns(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Clean numeric columns and computed fields for a whole chunk at once
+        (thousands separators, % signs); returns one array of values per column,
+        indexed by row position. CSV columns keep blanks as None (missing columns 0),
+        the metadata fields (METRIC_FIELDS) are already typed with blanks as 0
+        """
+        cleaned = pd.DataFrame(index=df.index)
+        for column in NUMERIC_COLUMNS:
+            if column not in df.columns:
+                cleaned[column] = 0
+            elif pd.api.types.is_numeric_dtype(df[column]):
+                cleaned[column] = df[column]
+            else:
+                # Text like "10,000" or "1.2%" becomes a float, anything else not a number becomes blank
+                text = df[column].astype('string').str.replace(',', '', regex=False).str.replace('%', '', regex=False)
+                cleaned[column] = pd.to_numeric(text.str.strip(), errors='coerce').astype(float)
+        
+        # Metadata fields, converted column-wise instead of per row
+        for field, column in FLOAT_FIELDS.items():
+            cleaned[field] = cleaned[column].fillna(0).astype(float)
+        for field, column in INTEGER_FIELDS.items():
+            cleaned[field] = cleaned[column].fillna(0).astype('int64')
+        
+        # Computed fields
+        views = cleaned['Video views'].fillna(0)
+        cleaned['has_clicks'] = cleaned['Clicks (destination)'].fillna(0) > 0
+        cleaned['has_video_views'] = views > 0
+        cleaned['completion_rate'] = np.where(
+            views > 0, cleaned['Video views at 100%'] / views.where(views > 0, 1) * 100, 0
+        )
+        
+        cleaned = cleaned.astype(object).where(cleaned.notna(), None)
+        return {column: cleaned[column].to_numpy() for column in cleaned.columns}
+    
+    def process_row(self, row: Dict, fields: Dict[str, np.ndarray], index: int, source: Dict) -> Dict:
         """
         Process TikTok ads row with ZERO data loss
         Stores both RAW original data and processed metadata
         """
         
-        # Extract period from filename
-        period = file_name.replace("tiktok_ads_export_", "").replace(".csv", "")
-        year, month = period.split("_")
-        
         # ==============================================================
         # PART 1: STORE RAW ORIGINAL DATA (100% PRESERVATION)
         # ==============================================================
         raw_data = {
-            'source_file': file_name,
-            'original_row': row.to_dict()  # Store EVERYTHING as-is
+            'source_file': source['file_name'],
+            'original_row': row  # Store EVERYTHING as-is
         }
         
         # ==============================================================
         # PART 2: CREATE PROCESSED METADATA (for efficient querying)
         # ==============================================================
         
-        # Extract and clean values
-        day = str(row.get('By Day', ''))
-        campaign_name = str(row.get('Campaign name', ''))
-        ad_group_name = str(row.get('Ad group name', ''))
-        ad_name = str(row.get('Ad name', ''))
-        website_url = str(row.get('Website URL (Ad level）', ''))
-        currency_code = str(row.get('Currency', 'AUD'))
-        
-        # Performance Metrics
-        cost = self.clean_numeric_value(row.get('Cost', 0))
-        cpc = self.clean_numeric_value(row.get('CPC (destination)', 0))
-        cpm = self.clean_numeric_value(row.get('CPM', 0))
-        impressions = self.clean_numeric_value(row.get('Impressions', 0))
-        clicks = self.clean_numeric_value(row.get('Clicks (destination)', 0))
-        ctr = self.clean_numeric_value(row.get('CTR (destination)', 0))
-        reach = self.clean_numeric_value(row.get('Reach', 0))
-        cost_per_1000_reached = self.clean_numeric_value(row.get('Cost per 1,000 people reached', 0))
-        frequency = self.clean_numeric_value(row.get('Frequency', 0))
-        
-        # Video Metrics
-        video_views = self.clean_numeric_value(row.get('Video views', 0))
-        video_views_2s = self.clean_numeric_value(row.get('2-second video views', 0))
-        video_views_6s = self.clean_numeric_value(row.get('6-second video views', 0))
-        video_views_100 = self.clean_numeric_value(row.get('Video views at 100%', 0))
-        video_views_75 = self.clean_numeric_value(row.get('Video views at 75%', 0))
-        video_views_50 = self.clean_numeric_value(row.get('Video views at 50%', 0))
-        video_views_25 = self.clean_numeric_value(row.get('Video views at 25%', 0))
-        avg_play_time_per_view = self.clean_numeric_value(row.get('Average play time per video view', 0))
-        avg_play_time_per_user = self.clean_numeric_value(row.get('Average play time per user', 0))
-        
         # Create processed metadata
         metadata = {
-            # Source information
-            'source_type': 'tiktok_ads',
-            'file_name': file_name,
-            'period': period,
-            'year': year,
-            'month': month,
-            
-            # All original properties (cleaned for querying)
-            'day': day,
-            'campaign_name': campaign_name,
-            'ad_group_name': ad_group_name,
-            'ad_name': ad_name,
-            'website_url': website_url,
-            'currency_code': currency_code,
-            'cost': float(cost) if cost else 0,
-            'cpc': float(cpc) if cpc else 0,
-            'cpm': float(cpm) if cpm else 0,
-            'impressions': int(impressions) if impressions else 0,
-            'clicks': int(clicks) if clicks else 0,
-            'ctr': float(ctr) if ctr else 0,
-            'reach': int(reach) if reach else 0,
-            'cost_per_1000_reached': float(cost_per_1000_reached) if cost_per_1000_reached else 0,
-            'frequency': float(frequency) if frequency else 0,
-            'video_views': int(video_views) if video_views else 0,
-            'video_views_2s': int(video_views_2s) if video_views_2s else 0,
-            'video_views_6s': int(video_views_6s) if video_views_6s else 0,
-            'video_views_100': int(video_views_100) if video_views_100 else 0,
-            'video_views_75': int(video_views_75) if video_views_75 else 0,
-            'video_views_50': int(video_views_50) if video_views_50 else 0,
-            'video_views_25': int(video_views_25) if video_views_25 else 0,
-            'avg_play_time_per_view': float(avg_play_time_per_view) if avg_play_time_per_view else 0,
-            'avg_play_time_per_user': float(avg_play_time_per_user) if avg_play_time_per_user else 0,
+            # Source information (the same for the whole file)
+            **source,
             
-            # Computed fields
-            'has_clicks': (clicks or 0) > 0,
-            'has_video_views': (video_views or 0) > 0,
-            'completion_rate': (video_views_100 / video_views * 100) if (video_views and video_views > 0) else 0
+            # All original properties, metrics and computed fields
+            # (already cleaned for the whole chunk)
+            **{field: fields[field][index] for field in TEXT_FIELDS},
+            **{field: fields[field][index] for field in METRIC_FIELDS}
         }
         
         # ==============================================================
         # PART 3: CREATE HUMAN-READABLE TEXT (for embeddings)
         # ==============================================================
-        text_content = f"""
-TikTok Ads Performance Record
-
-Date: {day}
-Campaign: {campaign_name}
-Ad Group: {ad_group_name}
-Ad Name: {ad_name}
-Website URL: {website_url}
-
-Performance Metrics:
-- Cost: {currency_code} {cost}
-- CPM (Cost Per 1000 Impressions): {currency_code} {cpm}
-- CPC (Cost Per Click): {currency_code} {cpc}
-- Impressions: {int(impressions) if impressions else 0:,}
-- Clicks: {int(clicks) if clicks else 0}
-- Click-Through Rate (CTR): {ctr}%
-- Reach: {int(reach) if reach else 0:,}
-- Cost per 1,000 Reached: {currency_code} {cost_per_1000_reached}
-- Frequency: {frequency}
-
-Video Performance:
-- Total Video Views: {int(video_views) if video_views else 0:,}
-- 2-Second Views: {int(video_views_2s) if video_views_2s else 0:,}
-- 6-Second Views: {int(video_views_6s) if video_views_6s else 0:,}
-- Video Completion Rates:
-  * 25% Completion: {int(video_views_25) if video_views_25 else 0:,}
-  * 50% Completion: {int(video_views_50) if video_views_50 else 0:,}
-  * 75% Completion: {int(video_views_75) if video_views_75 else 0:,}
-  * 100% Completion: {int(video_views_100) if video_views_100 else 0:,}
-- Average Play Time Per View: {avg_play_time_per_view}s
-- Average Play Time Per User: {avg_play_time_per_user}s
-
-Period: {month}/{year}
-File: {file_name}
-"""
+        # Integer counts come from metadata (formatted with thousands separators),
+        # everything else is shown exactly as exported
+        text_content = TEXT_TEMPLATE.format_map({
+            **metadata,
+            **{field: fields[column][index] for field, column in FLOAT_FIELDS.items()}
+        })
         
         return {
-            'text': text_content.strip(),
+            'text': text_content,
             'metadata': metadata,
             'raw_data': raw_data  # Original data preserved
         }
     
+    def embedding_key(self, text: str) -> str:
+        """Cache key for a text (the model is included so switching models never reuses stale vectors)"""
+        return hashlib.sha1(f"{EMBEDDING_MODEL}\n{text}".encode()).hexdigest()
+    
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of texts, only asking Gemini for ones not cached yet"""
+        keys = [self.embedding_key(text) for text in texts]
+        
+        placeholders = ','.join('?' * len(keys))
+        cached = {
+            key: np.frombuffer(emb, dtype=np.float32).tolist()
+            for key, emb in self.embedding_cache.execute(
+                f"SELECT hash, emb FROM embeddings WHERE hash IN ({placeholders})", keys
+            )
+        }
+        
+        # Unique texts still missing (identical rows are only embedded once)
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        if missing:
+            embeddings = self.embed_texts(list(missing.values()))
+            fresh = {key: embedding for key, embedding in zip(missing, embeddings) if embedding}
+            
+            with self.embedding_cache:
+                self.embedding_cache.executemany(
+                    "INSERT OR REPLACE INTO embeddings (hash, emb) VALUES (?, ?)",
+                    [(key, np.asarray(embedding, dtype=np.float32).tobytes()) for key, embedding in fresh.items()]
+                )
+            cached.update(fresh)
+        
+        return [cached.get(key) for key in keys]
+    
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for any number of texts, EMBED_BATCH_SIZE per Gemini
+        request with up to GEMINI_EMBED_CONCURRENCY requests in flight
+        """
+        batches = [texts[start:start + EMBED_BATCH_SIZE] for start in range(0, len(texts), EMBED_BATCH_SIZE)]
+        
+        embeddings = []
+        with ThreadPoolExecutor(max_workers=get_env()['GEMINI_EMBED_CONCURRENCY']) as executor:
+            for batch_embeddings in executor.map(self.request_embeddings, batches):
+                embeddings.extend(batch_embeddings)
+        return embeddings
+    
     def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding using Google Gemini"""
+        """Generate embedding for a single text (single-content request, not a batch of one)"""
         try:
-            result = genai.embed_content(
-                model=self.embedding_model,
-                content=text,
-                task_type="retrieval_document"
+            result = with_backoff(
+                lambda: get_genai().embed_content(
+                    model=EMBEDDING_MODEL,
+                    content=text,
+                    task_type="retrieval_document"
+                ),
+                limiter=get_gemini_limiter()
             )
             return result['embedding']
         except Exception as e:
             print(f"Error generating embedding: {e}")
-            time.sleep(2)
-            try:
-                result = genai.embed_content(
-                    model=self.embedding_model,
-                    content=text,
+            return None
+    
+    def request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of texts with one Google Gemini request"""
+        if len(texts) == 1:
+            return [self.generate_embedding(texts[0])]
+        
+        try:
+            # Rate limits and transient errors are retried with exponential backoff
+            result = with_backoff(
+                lambda: get_genai().embed_content(
+                    model=EMBEDDING_MODEL,
+                    content=texts,
                     task_type="retrieval_document"
-                )
-                return result['embedding']
-            except Exception as e2:
-                print(f"Retry failed: {e2}")
-                return None
+                ),
+                limiter=get_gemini_limiter()
+            )
+            return result['embedding']
+        except Exception as e:
+            print(f"Error generating embeddings: {e}")
+            return [None] * len(texts)
     
-    def store_in_pgvector(self, chunk: Dict, embedding: List[float]) -> bool:
-        """Store with ZERO data loss - includes raw_data"""
+    def store_in_pgvector(self, chunks: List[Dict], embeddings: List[List[float]]) -> bool:
+        """Store a batch with ZERO data loss - includes raw_data"""
         try:
-            data = {
-                'content': chunk['text'],
-                'metadata': json.dumps(chunk['metadata']),
-                'raw_data': json.dumps(chunk['raw_data']),  # Original data!
-                'embedding': embedding
-            }
+            data = [
+                {
+                    'content': chunk['text'],
+                    'metadata': orjson.dumps(chunk['metadata'], option=JSON_OPTIONS).decode(),
+                    'raw_data': orjson.dumps(chunk['raw_data'], option=JSON_OPTIONS).decode(),  # Original data!
+                    'embedding': embedding
+                }
+                for chunk, embedding in zip(chunks, embeddings)
+            ]
             
-            result = supabase.table('tiktok_ads_documents').insert(data).execute()
+            # Not retried: the table has no natural key, so retrying a batch that was committed
+            # before the response was lost would duplicate it (429s are retried by the client)
+            get_supabase().table('tiktok_ads_documents').insert(data).execute()
             return True
         except Exception as e:
             print(f"Error storing in PGVector: {e}")
             return False
     
+    def has_activity(self, chunk: Dict) -> bool:
+        """Whether a row had any impressions, clicks or video views (paused ads and off days don't)"""
+        metadata = chunk['metadata']
+        return metadata['impressions'] > 0 or metadata['clicks'] > 0 or metadata['video_views'] > 0
+    
+    def embed_and_store(self, chunks: List[Dict], inserter: ThreadPoolExecutor) -> Future:
+        """
+        Embed a batch of chunks, then hand the insert to the inserter thread
+        so the next batch is embedded while this one is being stored
+        Rows without activity aren't worth a Gemini call and are stored without an embedding
+        """
+        active = [chunk for chunk in chunks if self.has_activity(chunk)]
+        inactive = [chunk for chunk in chunks if not self.has_activity(chunk)]
+        
+        embeddings = self.generate_embeddings([chunk['text'] for chunk in active]) if active else []
+        return inserter.submit(self.store_embedded, active, embeddings, inactive)
+    
+    def store_embedded(self, chunks: List[Dict], embeddings: List[List[float]], inactive: List[Dict] = ()) -> tuple:
+        """Store the chunks that got an embedding, plus the inactive ones (NULL embedding, raw data kept)"""
+        embedded = [(chunk, embedding) for chunk, embedding in zip(chunks, embeddings) if embedding]
+        failed = len(chunks) - len(embedded)
+        
+        rows = embedded + [(chunk, None) for chunk in inactive]
+        if not rows:
+            return 0, failed
+        
+        if self.store_in_pgvector([chunk for chunk, _ in rows], [embedding for _, embedding in rows]):
+            return len(rows), failed
+        return 0, len(chunks) + len(inactive)
+    
     def process_file(self, file_path: Path):
         """Process TikTok ads file"""
         print(f"\n{'='*60}")
         print(f"Processing: {file_path.name}")
         print(f"{'='*60}")
         
-        df = self.read_csv_file(file_path)
+        reader = self.read_csv_file(file_path)
         
-        if df is None:
+        if reader is None:
             print("  ✗ Failed to read file")
             return 0, 0
         
-        print(f"  Found {len(df)} rows - preserving 100% of data")
+        # Extract period from filename once for the whole file
+        period = file_path.name.replace("tiktok_ads_export_", "").replace(".csv", "")
+        year, month = period.split("_")
+        source = {
+            'source_type': 'tiktok_ads',
+            'file_name': file_path.name,
+            'period': period,
+            'year': year,
+            'month': month
+        }
+        
+        chunks = []
+        stored = []
+        read = 0
+        rows = 0
+        inactive = 0
+        error = None
         
-        successful = 0
-        failed = 0
+        with contextlib.closing(reader), ThreadPoolExecutor(max_workers=1) as inserter:
+            try:
+                for df in reader:
+                    read += len(df)
+                    df = self.shrink_dataframe(df)
+                    
+                    # Convert the chunk to dicts at once (original_row keeps every column)
+                    # and pull the cleaned fields out as one array per column
+                    fields = {**self.clean_text_columns(df), **self.clean_numeric_columns(df)}
+                    for index, row in enumerate(df.to_dict(orient='records')):
+                        rows += 1
+                        
+                        # Process row (with raw data preservation)
+                        chunks.append(self.process_row(row, fields, index, source))
+                        if not self.has_activity(chunks[-1]):
+                            inactive += 1
+                        
+                        # Generate embeddings and store once the batch is full
+                        # (progress is shown once per batch, not every few rows)
+                        if len(chunks) >= INSERT_BATCH_SIZE:
+                            stored.append(self.embed_and_store(chunks, inserter))
+                            chunks = []
+                            print(f"  Batch {len(stored)} embedded ({rows} rows so far)...")
+                
+                # Remaining rows
+                if chunks:
+                    stored.append(self.embed_and_store(chunks, inserter))
+            except Exception as e:
+                # A bad chunk later in the file: keep the batches already sent
+                # and move on to the next file
+                error = e
         
-        for idx, row in df.iterrows():
-            # Process row (with raw data preservation)
-            chunk = self.process_row(row, file_path.name)
-            
-            # Show progress
-            if (idx + 1) % 50 == 0:
-                print(f"  Processing row {idx + 1}/{len(df)}...")
-            
-            # Generate embedding
-            embedding = self.generate_embedding(chunk['text'])
-            
-            if embedding:
-                if self.store_in_pgvector(chunk, embedding):
-                    successful += 1
-                else:
-                    failed += 1
-            else:
-                failed += 1
-            
-            # Rate limiting
-            time.sleep(0.5)
+        successful = sum(future.result()[0] for future in stored)
+        failed = sum(future.result()[1] for future in stored)
+        
+        if error is not None:
+            # Rows read but not stored yet count as failed (the rest of the file is skipped)
+            failed += read - successful - failed
+            print(f"\n  ✗ Error reading {file_path.name} after {read} rows, rest of the file skipped: {error}")
+            print(f"  ✗ Partially failed: {successful} successful, {failed} failed")
+            return successful, failed
         
-        print(f"\n  ✓ Completed: {successful} successful, {failed} failed")
+        print(f"\n  ✓ Completed {rows} rows: {successful} successful, {failed} failed")
         print(f"  ✓ Raw data preserved: {successful} rows")
+        print(f"  ✓ Not embedded (no impressions, clicks or video views): {inactive} rows")
         return successful, failed
     
     def process_all_files(self):
@@ -333,7 +566,8 @@ def main():
     print("\n➡️  NO DATA IS LOST - EVERYTHING IS PRESERVED")
     
     # Validate environment
-    if not all([SUPABASE_URL, SUPABASE_KEY, GOOGLE_API_KEY]):
+    env = get_env()
+    if not all([env['SUPABASE_URL'], env['SUPABASE_KEY'], env['GOOGLE_API_KEY']]):
         print("\n❌ Error: Missing environment variables!")
         print("Please ensure .env file contains:")
         print("  - SUPABASE_URL")
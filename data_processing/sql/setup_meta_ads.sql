@@ -55,13 +55,79 @@ CREATE TABLE IF NOT EXISTS meta_ads_performance (
     has_link_clicks BOOLEAN DEFAULT FALSE,
     has_video_content BOOLEAN DEFAULT FALSE,
     
-    -- Optional: Text content for search
-    content TEXT,
+    -- Text content for search: generated column, added below
     
     -- Optional: Embedding for AI (can add later)
     embedding TEXT
 );
 
+-- ============================================================================
+-- HELPERS for the generated content column (must be IMMUTABLE)
+-- ============================================================================
+
+-- 2024-01-15 (date::text depends on DateStyle, so it can't be used directly)
+CREATE OR REPLACE FUNCTION ads_date_text(d DATE)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$ SELECT COALESCE(to_char(d, 'YYYY-MM-DD'), 'None') $$;
+
+-- 1234567 -> 1,234,567
+CREATE OR REPLACE FUNCTION ads_thousands(n BIGINT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$ SELECT regexp_replace(COALESCE(n, 0)::text, '(\d)(?=(\d{3})+$)', '\1,', 'g') $$;
+
+-- ============================================================================
+-- CONTENT: human-readable text generated from the other columns
+-- The processor no longer builds or sends it, which keeps inserts small
+-- Existing tables: the plain content column is replaced (and filled) on first run
+-- ============================================================================
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'meta_ads_performance' AND column_name = 'content' AND is_generated = 'ALWAYS'
+    ) THEN
+        ALTER TABLE meta_ads_performance DROP COLUMN IF EXISTS content;
+        ALTER TABLE meta_ads_performance ADD COLUMN content TEXT GENERATED ALWAYS AS (
+            E'Meta Ads Performance Record\n\n'
+            || 'Date: ' || ads_date_text(day)
+            || E'\nCampaign: ' || COALESCE(campaign_name, '')
+            || E'\nAd Set: ' || COALESCE(ad_set_name, '')
+            || E'\nAd Name: ' || COALESCE(ad_name, '')
+            || E'\nObjective: ' || COALESCE(objective, '')
+            || E'\nResult Type: ' || COALESCE(result_type, '')
+            || E'\n\nPerformance Metrics:'
+            || E'\n- Reach: ' || ads_thousands(reach)
+            || E'\n- Impressions: ' || ads_thousands(impressions)
+            || E'\n- Frequency: ' || COALESCE(frequency, 0)::text
+            || E'\n- Results: ' || COALESCE(results, 0)::text
+            || E'\n- Amount Spent: AUD ' || COALESCE(amount_spent, 0)::text
+            || E'\n- Cost Per Result: AUD ' || COALESCE(cost_per_result, 0)::text
+            || E'\n- Link Clicks: ' || COALESCE(link_clicks, 0)::text
+            || E'\n- CPC: AUD ' || COALESCE(cpc, 0)::text
+            || E'\n- CPM: AUD ' || COALESCE(cpm, 0)::text
+            || E'\n\nVideo Metrics:'
+            || E'\n- Average Play Time: ' || COALESCE(video_avg_play_time, 0)::text || 's'
+            || E'\n- ThruPlays: ' || COALESCE(thru_plays, 0)::text
+            || E'\n- Cost Per ThruPlay: AUD ' || COALESCE(cost_per_thruplay, 0)::text
+            || E'\n- Video Plays at 25%: ' || COALESCE(video_plays_25, 0)::text
+            || E'\n- Video Plays at 50%: ' || COALESCE(video_plays_50, 0)::text
+            || E'\n- Video Plays at 75%: ' || COALESCE(video_plays_75, 0)::text
+            || E'\n- Video Plays at 95%: ' || COALESCE(video_plays_95, 0)::text
+            || E'\n- Video Plays at 100%: ' || COALESCE(video_plays_100, 0)::text
+            || E'\n\nCampaign Timeline:'
+            || E'\n- Starts: ' || COALESCE(starts, '')
+            || E'\n- Ends: ' || COALESCE(ends, '')
+            || E'\n- Reporting Period: ' || COALESCE(reporting_starts, '') || ' to ' || COALESCE(reporting_ends, '')
+            || E'\n\nWebsite: ' || COALESCE(website_url, '')
+            || E'\nPeriod: ' || month || '/' || year
+            || E'\nFile: ' || file_name
+        ) STORED;
+    END IF;
+END $$;
+
 -- ============================================================================
 -- INDEXES for Fast Querying
 -- ============================================================================
@@ -78,6 +144,10 @@ CREATE INDEX IF NOT EXISTS idx_meta_has_link_clicks ON meta_ads_performance(has_
 CREATE INDEX IF NOT EXISTS idx_meta_has_video_content ON meta_ads_performance(has_video_content) WHERE has_video_content = TRUE;
 CREATE INDEX IF NOT EXISTS idx_meta_created_at ON meta_ads_performance(created_at);
 
+-- Natural key so re-running the processor never duplicates rows (upsert on_conflict target)
+-- Note: remove existing duplicate rows first if the table was loaded more than once
+CREATE UNIQUE INDEX IF NOT EXISTS idx_meta_natural_key ON meta_ads_performance(day, campaign_name, ad_set_name, ad_name);
+
 -- Full-text search on content
 CREATE INDEX IF NOT EXISTS idx_meta_content_search ON meta_ads_performance USING GIN (to_tsvector('english', content));
 
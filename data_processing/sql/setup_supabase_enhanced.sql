@@ -88,6 +88,74 @@ CREATE TRIGGER update_google_ads_documents_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+-- Natural key so re-running the processor never duplicates rows
+-- metadata is stored JSON-encoded, so unwrap it (#>> '{}') before reading fields
+-- Note: remove existing duplicate rows first if the table was loaded more than once
+CREATE UNIQUE INDEX IF NOT EXISTS google_ads_documents_natural_key_idx
+ON google_ads_documents (
+    ((metadata #>> '{}')::jsonb ->> 'file_name'),
+    ((metadata #>> '{}')::jsonb ->> 'day'),
+    ((metadata #>> '{}')::jsonb ->> 'campaign'),
+    ((metadata #>> '{}')::jsonb ->> 'ad_group'),
+    (COALESCE((metadata #>> '{}')::jsonb ->> 'landing_page', '')),
+    (COALESCE((metadata #>> '{}')::jsonb ->> 'conversion_action', ''))
+);
+
+-- Bulk ingest: one RPC call upserts a whole JSON array of documents
+-- Rows already stored (same natural key) are replaced, so re-ingesting a corrected
+-- export updates them; if a payload repeats a key, its last row wins
+-- embedding is optional: documents sent without one keep the stored embedding
+-- Returns rows inserted or updated
+-- Called from process_google_ads_simple.py and process_google_ads_zero_loss.py via supabase.rpc()
+-- (setup_supabase_simple.sql defines the same index and function)
+CREATE OR REPLACE FUNCTION ingest_google_ads_documents(payload jsonb)
+RETURNS int
+LANGUAGE sql
+AS $$
+    WITH documents AS (
+        SELECT x.content, x.metadata, x.raw_data, x.embedding, d.position, (x.metadata #>> '{}')::jsonb AS fields
+        FROM jsonb_array_elements(payload) WITH ORDINALITY AS d(document, position),
+             -- Fields are parsed as the table's own column types (embedding is TEXT
+             -- here, vector(768) in the enhanced setup)
+             jsonb_populate_record(NULL::google_ads_documents, d.document) AS x
+    ),
+    upserted AS (
+        INSERT INTO google_ads_documents (content, metadata, raw_data, embedding)
+        SELECT DISTINCT ON (
+            fields ->> 'file_name',
+            fields ->> 'day',
+            fields ->> 'campaign',
+            fields ->> 'ad_group',
+            COALESCE(fields ->> 'landing_page', ''),
+            COALESCE(fields ->> 'conversion_action', '')
+        ) content, metadata, raw_data, embedding
+        FROM documents
+        ORDER BY
+            fields ->> 'file_name',
+            fields ->> 'day',
+            fields ->> 'campaign',
+            fields ->> 'ad_group',
+            COALESCE(fields ->> 'landing_page', ''),
+            COALESCE(fields ->> 'conversion_action', ''),
+            position DESC
+        ON CONFLICT (
+            ((metadata #>> '{}')::jsonb ->> 'file_name'),
+            ((metadata #>> '{}')::jsonb ->> 'day'),
+            ((metadata #>> '{}')::jsonb ->> 'campaign'),
+            ((metadata #>> '{}')::jsonb ->> 'ad_group'),
+            (COALESCE((metadata #>> '{}')::jsonb ->> 'landing_page', '')),
+            (COALESCE((metadata #>> '{}')::jsonb ->> 'conversion_action', ''))
+        )
+        DO UPDATE SET
+            content = EXCLUDED.content,
+            metadata = EXCLUDED.metadata,
+            raw_data = EXCLUDED.raw_data,
+            embedding = COALESCE(EXCLUDED.embedding, google_ads_documents.embedding)
+        RETURNING 1
+    )
+    SELECT COUNT(*)::int FROM upserted;
+$$;
+
 -- Comments
 COMMENT ON TABLE google_ads_documents IS 'Stores Google Ads data with 100% preservation - includes raw data, processed metadata, and embeddings';
 COMMENT ON COLUMN google_ads_documents.content IS 'Human-readable text for embeddings';
@@ -95,6 +163,7 @@ COMMENT ON COLUMN google_ads_documents.metadata IS 'Processed metadata for effic
 COMMENT ON COLUMN google_ads_documents.raw_data IS 'Original raw CSV data - 100% preservation of source';
 COMMENT ON COLUMN google_ads_documents.embedding IS 'Vector embedding from Google Gemini (768 dimensions)';
 COMMENT ON FUNCTION match_google_ads_documents IS 'Semantic similarity search function';
+COMMENT ON FUNCTION ingest_google_ads_documents IS 'Bulk upsert of documents on their natural key';
 
 -- Verification query
 SELECT 
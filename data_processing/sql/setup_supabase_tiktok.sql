@@ -51,12 +51,74 @@ CREATE TABLE IF NOT EXISTS tiktok_ads_performance (
     -- Computed Fields
     has_clicks BOOLEAN DEFAULT FALSE,
     has_video_views BOOLEAN DEFAULT FALSE,
-    completion_rate NUMERIC(10, 2) DEFAULT 0,
+    completion_rate NUMERIC(10, 2) DEFAULT 0
     
-    -- Optional: Text content for search
-    content TEXT
+    -- Text content for search: generated column, added below
 );
 
+-- ============================================================================
+-- HELPERS for the generated content column (must be IMMUTABLE)
+-- ============================================================================
+
+-- 2024-01-15 (date::text depends on DateStyle, so it can't be used directly)
+CREATE OR REPLACE FUNCTION ads_date_text(d DATE)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$ SELECT COALESCE(to_char(d, 'YYYY-MM-DD'), 'None') $$;
+
+-- 1234567 -> 1,234,567
+CREATE OR REPLACE FUNCTION ads_thousands(n BIGINT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$ SELECT regexp_replace(COALESCE(n, 0)::text, '(\d)(?=(\d{3})+$)', '\1,', 'g') $$;
+
+-- ============================================================================
+-- CONTENT: human-readable text generated from the other columns
+-- The processor no longer builds or sends it, which keeps inserts small
+-- Existing tables: the plain content column is replaced (and filled) on first run
+-- ============================================================================
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'tiktok_ads_performance' AND column_name = 'content' AND is_generated = 'ALWAYS'
+    ) THEN
+        ALTER TABLE tiktok_ads_performance DROP COLUMN IF EXISTS content;
+        ALTER TABLE tiktok_ads_performance ADD COLUMN content TEXT GENERATED ALWAYS AS (
+            E'TikTok Ads Performance Record\n\n'
+            || 'Date: ' || ads_date_text(day)
+            || E'\nCampaign: ' || COALESCE(campaign_name, '')
+            || E'\nAd Group: ' || COALESCE(ad_group_name, '')
+            || E'\nAd Name: ' || COALESCE(ad_name, '')
+            || E'\nWebsite URL: ' || COALESCE(website_url, '')
+            || E'\n\nPerformance Metrics:'
+            || E'\n- Cost: ' || COALESCE(currency_code, '') || ' ' || COALESCE(cost, 0)::text
+            || E'\n- CPM (Cost Per 1000 Impressions): ' || COALESCE(currency_code, '') || ' ' || COALESCE(cpm, 0)::text
+            || E'\n- CPC (Cost Per Click): ' || COALESCE(currency_code, '') || ' ' || COALESCE(cpc, 0)::text
+            || E'\n- Impressions: ' || ads_thousands(impressions)
+            || E'\n- Clicks: ' || COALESCE(clicks, 0)::text
+            || E'\n- Click-Through Rate (CTR): ' || COALESCE(ctr, 0)::text || '%'
+            || E'\n- Reach: ' || ads_thousands(reach)
+            || E'\n- Cost per 1,000 Reached: ' || COALESCE(currency_code, '') || ' ' || COALESCE(cost_per_1000_reached, 0)::text
+            || E'\n- Frequency: ' || COALESCE(frequency, 0)::text
+            || E'\n\nVideo Performance:'
+            || E'\n- Total Video Views: ' || ads_thousands(video_views)
+            || E'\n- 2-Second Views: ' || ads_thousands(video_views_2s)
+            || E'\n- 6-Second Views: ' || ads_thousands(video_views_6s)
+            || E'\n- Video Completion Rates:'
+            || E'\n  * 25% Completion: ' || ads_thousands(video_views_25)
+            || E'\n  * 50% Completion: ' || ads_thousands(video_views_50)
+            || E'\n  * 75% Completion: ' || ads_thousands(video_views_75)
+            || E'\n  * 100% Completion: ' || ads_thousands(video_views_100)
+            || E'\n- Average Play Time Per View: ' || COALESCE(avg_play_time_per_view, 0)::text || 's'
+            || E'\n- Average Play Time Per User: ' || COALESCE(avg_play_time_per_user, 0)::text || 's'
+            || E'\n\nPeriod: ' || month || '/' || year
+            || E'\nFile: ' || file_name
+        ) STORED;
+    END IF;
+END $$;
+
 -- ============================================================================
 -- TABLE 2: TikTok Ads Documents (Simple/Zero Loss Version)
 -- ============================================================================
@@ -87,6 +149,10 @@ CREATE INDEX IF NOT EXISTS idx_tiktok_performance_has_clicks ON tiktok_ads_perfo
 CREATE INDEX IF NOT EXISTS idx_tiktok_performance_has_video_views ON tiktok_ads_performance(has_video_views) WHERE has_video_views = TRUE;
 CREATE INDEX IF NOT EXISTS idx_tiktok_performance_created_at ON tiktok_ads_performance(created_at);
 
+-- Natural key so re-running the processor never duplicates rows (upsert on_conflict target)
+-- Note: remove existing duplicate rows first if the table was loaded more than once
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tiktok_performance_natural_key ON tiktok_ads_performance(day, campaign_name, ad_group_name, ad_name);
+
 -- Full-text search on content
 CREATE INDEX IF NOT EXISTS idx_tiktok_performance_content_search ON tiktok_ads_performance USING GIN (to_tsvector('english', content));
 
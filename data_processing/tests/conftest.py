@@ -0,0 +1,21 @@
+"""
+Shared pytest fixtures for the setup tests
+"""
+
+import sys
+from pathlib import Path
+import pytest
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.env import get_env, get_supabase
+
+
+@pytest.fixture(scope='session')
+def supabase_client():
+    """One cached Supabase client for the whole test session"""
+    env = get_env()
+    if not env['SUPABASE_URL'] or not env['SUPABASE_KEY']:
+        pytest.skip("SUPABASE_URL / SUPABASE_KEY not set")
+    return get_supabase()
@@ -2,22 +2,27 @@
 Test script to verify setup and connectivity
 """
 
-import os
-from dotenv import load_dotenv
+import sys
+from pathlib import Path
 import google.generativeai as genai
-from supabase import create_client
 
-# Load environment variables
-load_dotenv()
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.env import get_env, get_supabase
+from utils.setup_checks import HR
+
+# Load environment variables once (shared with the Supabase client) and read them from here
+ENV = get_env()
 
 def test_env_variables():
     """Check if all required environment variables are set"""
     print("Testing Environment Variables...")
     
     required_vars = {
-        'SUPABASE_URL': os.getenv('SUPABASE_URL'),
-        'SUPABASE_KEY': os.getenv('SUPABASE_KEY'),
-        'GOOGLE_API_KEY': os.getenv('GOOGLE_API_KEY')
+        'SUPABASE_URL': ENV['SUPABASE_URL'],
+        'SUPABASE_KEY': ENV['SUPABASE_KEY'],
+        'GOOGLE_API_KEY': ENV['GOOGLE_API_KEY']
     }
     
     all_set = True
@@ -35,14 +40,15 @@ def test_supabase_connection():
     print("\nTesting Supabase Connection...")
     
     try:
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_KEY')
+        supabase_url = ENV['SUPABASE_URL']
+        supabase_key = ENV['SUPABASE_KEY']
         
         if not supabase_url or not supabase_key:
             print("  ✗ Missing Supabase credentials")
             return False
         
-        client = create_client(supabase_url, supabase_key)
+        # Cached client: one HTTP session for every check
+        client = get_supabase()
         
         # Try to query the table
         result = client.table('google_ads_documents').select("id").limit(1).execute()
@@ -60,7 +66,7 @@ def test_gemini_api():
     print("\nTesting Google Gemini API...")
     
     try:
-        api_key = os.getenv('GOOGLE_API_KEY')
+        api_key = ENV['GOOGLE_API_KEY']
         
         if not api_key:
             print("  ✗ Missing Google API key")
@@ -104,13 +110,14 @@ def test_data_folder():
     print(f"  ✓ Data folder exists: {data_folder}")
     
     # Count CSV files
-    performance_files = list(data_folder.glob("google_ads_performance_*.csv"))
-    action_files = list(data_folder.glob("google_ads_actions_*.csv"))
+    # (only the counts are needed, so the matches are never collected into lists)
+    performance_files = sum(1 for _ in data_folder.glob("google_ads_performance_*.csv"))
+    action_files = sum(1 for _ in data_folder.glob("google_ads_actions_*.csv"))
     
-    print(f"  ✓ Found {len(performance_files)} performance files")
-    print(f"  ✓ Found {len(action_files)} action files")
+    print(f"  ✓ Found {performance_files} performance files")
+    print(f"  ✓ Found {action_files} action files")
     
-    if len(performance_files) == 0 and len(action_files) == 0:
+    if performance_files == 0 and action_files == 0:
         print("  ⚠ Warning: No CSV files found")
         return False
     
@@ -118,9 +125,9 @@ def test_data_folder():
 
 def main():
     """Run all tests"""
-    print("="*60)
+    print(HR)
     print("Google Ads Data Processing - Setup Test")
-    print("="*60)
+    print(HR)
     
     tests = [
         test_env_variables(),
@@ -129,9 +136,9 @@ def main():
         test_data_folder()
     ]
     
-    print("\n" + "="*60)
+    print("\n" + HR)
     print("Test Results Summary")
-    print("="*60)
+    print(HR)
     
     if all(tests):
         print("✅ All tests passed! You're ready to run process_google_ads.py")
@@ -0,0 +1,46 @@
+"""
+Setup tests for the Google Ads (simple, structured) and TikTok Ads (structured) processors
+The checks and each processor's config live in utils/setup_checks.py
+
+Run with: pytest data_processing/tests/test_setup_ads.py
+Or check one processor as a script: python data_processing/tests/test_setup_simple.py
+(add --fast to only check that the tables are reachable, without counting rows)
+"""
+
+import sys
+from pathlib import Path
+import pytest
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.setup_checks import CONFIGS, count_export_files, count_tables, missing_env_variables
+
+
+# ============================================================================
+# pytest
+# ============================================================================
+
+def test_env_variables():
+    """Check if required environment variables are set"""
+    missing = missing_env_variables()
+    assert not missing, f"Environment variables NOT set: {missing}"
+
+
+@pytest.mark.parametrize('name', CONFIGS)
+def test_supabase_connection(supabase_client, name):
+    """Test connection to Supabase and check the tables (run the config's SQL script if this fails)"""
+    for table, row_count in count_tables(supabase_client, CONFIGS[name]['tables']).items():
+        print(f"{table}: ≈ {row_count} rows")
+        assert isinstance(row_count, int) and row_count >= 0, f"{table}: unexpected row count {row_count!r}"
+
+
+@pytest.mark.parametrize('name', CONFIGS)
+def test_data_folder(name):
+    """Check if data folder exists and has export files"""
+    config = CONFIGS[name]
+    counts = count_export_files(config)
+    if counts is None:
+        pytest.skip(f"Folder not found: {config['folder']}")
+    
+    assert any(counts.values()), f"No CSV files found in {config['folder']}"
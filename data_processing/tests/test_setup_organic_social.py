@@ -3,15 +3,17 @@ Test script for Organic Social Media setup
 Verifies database connection and table structure
 """
 
-import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
+import sys
+from pathlib import Path
 
-# Load environment variables
-load_dotenv()
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+from utils.env import get_env, get_supabase
+
+# Load environment variables (once per process, shared with the Supabase client)
+SUPABASE_URL = get_env()['SUPABASE_URL']
+SUPABASE_KEY = get_env()['SUPABASE_KEY']
 
 def test_connection():
     """Test Supabase connection"""
@@ -33,7 +35,7 @@ def test_connection():
     # Test connection
     print("\n2. Testing Supabase connection...")
     try:
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase = get_supabase()
         print("  ✓ Connection successful")
     except Exception as e:
         print(f"  ❌ Connection failed: {e}")
@@ -2,20 +2,25 @@
 Test script to verify Power BI setup
 """
 
-import os
-from dotenv import load_dotenv
-from supabase import create_client
+import sys
+from pathlib import Path
 
-# Load environment variables
-load_dotenv()
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.env import get_env, get_supabase
+from utils.setup_checks import HR, print_next_steps
+
+# Load environment variables once (shared with the Supabase client) and read them from here
+ENV = get_env()
 
 def test_env_variables():
     """Check if required environment variables are set"""
     print("Testing Environment Variables...")
     
     required_vars = {
-        'SUPABASE_URL': os.getenv('SUPABASE_URL'),
-        'SUPABASE_KEY': os.getenv('SUPABASE_KEY')
+        'SUPABASE_URL': ENV['SUPABASE_URL'],
+        'SUPABASE_KEY': ENV['SUPABASE_KEY']
     }
     
     all_set = True
@@ -33,22 +38,21 @@ def test_supabase_connection():
     print("\nTesting Supabase Connection...")
     
     try:
-        supabase_url = os.getenv('SUPABASE_URL')
-        supabase_key = os.getenv('SUPABASE_KEY')
+        supabase_url = ENV['SUPABASE_URL']
+        supabase_key = ENV['SUPABASE_KEY']
         
         if not supabase_url or not supabase_key:
             print("  ✗ Missing Supabase credentials")
             return False
         
-        client = create_client(supabase_url, supabase_key)
+        # Cached client: one HTTP session for every check
+        client = get_supabase()
         
-        # Try to query the table
-        result = client.table('powerbi_sales').select("id").limit(1).execute()
+        # Query the table's row count (fails if the table isn't accessible)
+        count_result = client.table('powerbi_sales').select("*", count="exact", head=True).execute()
         print("  ✓ Successfully connected to Supabase")
         print(f"  ✓ Table 'powerbi_sales' is accessible")
         
-        # Show row count
-        count_result = client.table('powerbi_sales').select("id", count="exact").execute()
         row_count = count_result.count if hasattr(count_result, 'count') else 0
         print(f"  ✓ Current rows in table: {row_count}")
         
@@ -93,9 +97,9 @@ def test_data_folder():
 
 def main():
     """Run all tests"""
-    print("="*60)
+    print(HR)
     print("Power BI Data Processing - Setup Test")
-    print("="*60)
+    print(HR)
     
     tests = [
         test_env_variables(),
@@ -103,26 +107,19 @@ def main():
         test_data_folder()
     ]
     
-    print("\n" + "="*60)
+    print("\n" + HR)
     print("Test Results Summary")
-    print("="*60)
+    print(HR)
     
     if all(tests):
         print("✅ All tests passed! You're ready to run process_powerbi.py")
     else:
         print("❌ Some tests failed. Please fix the issues above before proceeding.")
     
-    print("\nNext steps:")
-    if all(tests):
-        print("1. Run: python process_powerbi.py")
-        print("2. Data will be stored directly (no embeddings)")
-        print("3. Check your Supabase dashboard to see the data")
-    else:
-        print("1. Fix the issues above")
-        print("2. Make sure:")
-        print("   - Your .env file has SUPABASE_URL and SUPABASE_KEY")
-        print("   - You've run setup_powerbi.sql in Supabase")
-        print("   - Your CSV files are in NBX/Power BI/")
+    print_next_steps(all(tests), 'process_powerbi.py', 'setup_powerbi.sql', 'NBX/Power BI', [
+        'Data will be stored directly (no embeddings)',
+        'Check your Supabase dashboard to see the data'
+    ])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,3 @@
+"""
+Shared helpers for the data processing scripts and tests
+"""
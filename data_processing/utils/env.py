@@ -0,0 +1,64 @@
+"""
+Cached environment and database client accessors
+Parses .env and builds the Supabase client (and optional Postgres connection) once per process
+dotenv and supabase are imported on first use, so code that only reads the
+env (like the setup checks) doesn't pay for loading the Supabase client stack
+"""
+
+import os
+import functools
+
+
+@functools.lru_cache(maxsize=1)
+def get_env() -> dict:
+    """Load .env once and return the settings (None when unset)"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return {
+        'SUPABASE_URL': os.getenv("SUPABASE_URL"),
+        'SUPABASE_KEY': os.getenv("SUPABASE_KEY"),
+        # Opt-in: gzip large request bodies (insert/RPC payloads) on the wire
+        'SUPABASE_GZIP_REQUESTS': os.getenv("SUPABASE_GZIP_REQUESTS", "").lower() in ("1", "true", "yes"),
+        # Optional: direct Postgres connection string for fast COPY loads (needs psycopg2)
+        'DATABASE_URL': os.getenv("DATABASE_URL"),
+        
+        # Gemini embeddings (zero-loss processors)
+        'GOOGLE_API_KEY': os.getenv("GOOGLE_API_KEY"),
+        # Optional request budget (e.g. 60 on the free tier); 0 means no client-side limit
+        'GEMINI_REQUESTS_PER_MINUTE': int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "0")),
+        # Gemini requests in flight at once; raise it on paid tiers (thousands of requests
+        # per minute) - GEMINI_REQUESTS_PER_MINUTE still caps the overall rate
+        'GEMINI_EMBED_CONCURRENCY': int(os.getenv("GEMINI_EMBED_CONCURRENCY", "4")),
+        # Local cache of embeddings already generated, so re-runs skip the Gemini calls
+        'EMBEDDING_CACHE_PATH': os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db"),
+        
+        # Google Ads structured processor: rows per insert request, and inserts at once
+        'GOOGLE_ADS_BATCH_SIZE': int(os.getenv("GOOGLE_ADS_BATCH_SIZE", "500")),
+        'GOOGLE_ADS_CONCURRENCY': int(os.getenv("GOOGLE_ADS_CONCURRENCY", "2")),
+        
+        # Meta / TikTok Ads structured processors: batch inserts at once
+        'META_ADS_CONCURRENCY': int(os.getenv("META_ADS_CONCURRENCY", "4")),
+        'TIKTOK_ADS_CONCURRENCY': int(os.getenv("TIKTOK_ADS_CONCURRENCY", "4"))
+    }
+
+
+@functools.lru_cache(maxsize=1)
+def get_supabase():
+    """Create the Supabase client on first use and reuse it (and its connection pool) afterwards"""
+    from supabase import create_client, ClientOptions
+    from utils.http import build_http_client
+    
+    env = get_env()
+    http_client = build_http_client(gzip_requests=env['SUPABASE_GZIP_REQUESTS'])
+    return create_client(
+        env['SUPABASE_URL'],
+        env['SUPABASE_KEY'],
+        options=ClientOptions(httpx_client=http_client)
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_postgres():
+    """Open the optional direct Postgres connection (DATABASE_URL, needs psycopg2) once and reuse it"""
+    import psycopg2
+    return psycopg2.connect(get_env()['DATABASE_URL'])
@@ -0,0 +1,105 @@
+"""
+HTTP transport helpers for the Supabase client
+"""
+
+import gzip
+import random
+import time
+import httpx
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Bodies smaller than this are sent as-is; compressing them costs more than it saves
+GZIP_MIN_SIZE = 1024
+
+# Rate-limited (429) requests are retried this many times before the 429 is returned
+RATE_LIMIT_ATTEMPTS = 5
+
+# Keep enough warm connections for concurrent batch uploads (no TLS handshake per request)
+POOL_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+
+
+class GzipRequestTransport(httpx.BaseTransport):
+    """Wrap a transport and gzip request bodies larger than min_size"""
+    
+    def __init__(self, transport: httpx.BaseTransport, min_size: int = GZIP_MIN_SIZE):
+        self._transport = transport
+        self.min_size = min_size
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        if len(body) > self.min_size and 'Content-Encoding' not in request.headers:
+            headers = request.headers.copy()
+            headers['Content-Encoding'] = 'gzip'
+            del headers['Content-Length']
+            request = httpx.Request(
+                request.method,
+                request.url,
+                headers=headers,
+                content=gzip.compress(body),
+                extensions=request.extensions
+            )
+        return self._transport.handle_request(request)
+    
+    def close(self):
+        self._transport.close()
+
+
+def rate_limit_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait after a 429: the server's Retry-After, else jittered exponential backoff"""
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return random.uniform(0, min(8.0, 0.5 * 2 ** attempt))
+
+
+class RateLimitRetryTransport(httpx.BaseTransport):
+    """Wrap a transport and retry rate-limited (429) responses; other requests never wait"""
+    
+    def __init__(self, transport: httpx.BaseTransport, attempts: int = RATE_LIMIT_ATTEMPTS):
+        self._transport = transport
+        self.attempts = attempts
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        for attempt in range(self.attempts):
+            response = self._transport.handle_request(request)
+            if response.status_code != 429 or attempt == self.attempts - 1:
+                return response
+            
+            # Release the connection before waiting
+            response.read()
+            response.close()
+            delay = rate_limit_delay(response, attempt)
+            print(f"  Rate limited, retrying in {delay:.1f}s")
+            time.sleep(delay)
+    
+    def close(self):
+        self._transport.close()
+
+
+class OrjsonClient(httpx.Client):
+    """httpx client that encodes json= bodies (insert/RPC payloads) with orjson instead of stdlib json"""
+    
+    def build_request(self, method, url, *, content=None, json=None, headers=None, **kwargs) -> httpx.Request:
+        if json is not None and content is None:
+            # NaN becomes null instead of failing like json.dumps(allow_nan=False)
+            content = orjson.dumps(json, option=orjson.OPT_SERIALIZE_NUMPY)
+            headers = httpx.Headers(headers)
+            headers['Content-Type'] = 'application/json'
+            json = None
+        return super().build_request(method, url, content=content, json=json, headers=headers, **kwargs)
+
+
+def build_http_client(gzip_requests: bool = False) -> httpx.Client:
+    """Pooled keep-alive HTTP/2 client for Supabase, optionally gzipping large bodies"""
+    transport = RateLimitRetryTransport(httpx.HTTPTransport(http2=True, limits=POOL_LIMITS))
+    if gzip_requests:
+        transport = GzipRequestTransport(transport)
+    
+    # Fall back to httpx's own (stdlib) JSON encoding when orjson isn't installed
+    client_class = OrjsonClient if orjson else httpx.Client
+    return client_class(transport=transport, timeout=120, follow_redirects=True)
@@ -0,0 +1,55 @@
+"""
+Backoff helpers for rate-limited APIs (Gemini, Supabase)
+Only sleep when a call actually fails or the request budget is used up,
+instead of padding every call with a fixed delay
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class RateLimiter:
+    """Token bucket: allows `rate` calls per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping only if the bucket is empty"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0
+            self.tokens -= 1
+
+        if wait:
+            time.sleep(wait)
+
+
+def with_backoff(fn: Callable[[], T], attempts: int = 5, initial: float = 0.5,
+                 maximum: float = 8.0, limiter: Optional[RateLimiter] = None) -> T:
+    """
+    Call fn(), retrying failures with exponential backoff and full jitter
+    (0.5s, 1s, 2s, ... capped at `maximum`); the last error is re-raised
+    """
+    for attempt in range(attempts):
+        if limiter:
+            limiter.acquire()
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            delay = random.uniform(0, min(maximum, initial * 2 ** attempt))
+            print(f"  Retrying in {delay:.1f}s ({e})")
+            time.sleep(delay)
@@ -0,0 +1,271 @@
+"""
+Shared checks for the setup tests and their script runners
+Each ads processor is one entry in CONFIGS: the tables it writes, its data folder and export files
+Lives outside tests/ so the setup tests import it instead of each other
+"""
+
+import io
+import os
+import sys
+import fnmatch
+import functools
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.env import get_env, get_supabase
+
+# Horizontal rule between report sections
+HR = "=" * 60
+
+CONFIGS = {
+    'simple': {
+        'title': 'Google Ads Data Processing - Setup Test (Simple)',
+        'tables': ['google_ads_documents'],
+        'sql': 'setup_supabase_simple.sql',
+        'folder': Path('NBX/Google Ads Export'),
+        'globs': {
+            'performance': 'google_ads_performance_*.csv',
+            'action': 'google_ads_actions_*.csv'
+        },
+        'script': 'process_google_ads_simple.py',
+        'next_steps': [
+            'Data will be stored directly (no embeddings)',
+            'Check your Supabase dashboard to see the data'
+        ]
+    },
+    'structured': {
+        'title': 'Google Ads Data Processing - Setup Test (Structured)',
+        'tables': ['google_ads_performance', 'google_ads_actions'],
+        'sql': 'setup_supabase_structured.sql',
+        'folder': Path('NBX/Google Ads Export'),
+        'globs': {
+            'performance': 'google_ads_performance_*.csv',
+            'action': 'google_ads_actions_*.csv'
+        },
+        'script': 'process_google_ads_structured.py',
+        'next_steps': [
+            'Data will be stored in structured columns',
+            'Query with standard SQL (no JSONB operators needed)'
+        ]
+    },
+    'tiktok': {
+        'title': 'TikTok Ads Data Processing - Setup Test (Structured)',
+        'tables': ['tiktok_ads_performance'],
+        'sql': 'setup_supabase_tiktok.sql',
+        'folder': Path('NBX/TikTok Ads Export'),
+        'globs': {
+            'TikTok ads': 'tiktok_ads_export_*.csv'
+        },
+        'script': 'process_tiktok_ads_structured.py',
+        'next_steps': [
+            'Data will be stored in structured columns',
+            'Query with standard SQL (no JSONB operators needed)'
+        ]
+    }
+}
+
+
+# Required for every processor
+ENV_VARIABLES = ('SUPABASE_URL', 'SUPABASE_KEY')
+
+
+@functools.lru_cache(maxsize=None)
+def check_env(names: tuple = ENV_VARIABLES) -> tuple:
+    """Required environment variables that are not set (checked once per process)"""
+    env = get_env()
+    return tuple(name for name in names if not env[name])
+
+
+def missing_env_variables() -> tuple:
+    """Required environment variables that are not set"""
+    return check_env(ENV_VARIABLES)
+
+
+# Planned row counts below this are checked with an exact count
+EXACT_COUNT_BELOW = 1000
+
+
+def count_rows(client, table: str) -> int:
+    """
+    Check that a table is accessible and return its approximate row count (raises if not accessible)
+    Uses the planner's estimate instead of a full count(*). A fresh or unanalyzed table
+    gets a small planner guess rather than a real figure, so small estimates are
+    replaced by an exact count (cheap at that size)
+    """
+    result = client.table(table).select("*", count="planned", head=True).execute()
+    if (result.count or 0) < EXACT_COUNT_BELOW:
+        result = client.table(table).select("*", count="exact", head=True).execute()
+    return result.count or 0
+
+
+def check_table(client, table: str):
+    """Check that a table is accessible without counting it (fetches at most one row, raises if not accessible)"""
+    client.table(table).select("*").limit(1).execute()
+
+
+def count_tables(client, tables: list, fast: bool = False) -> dict:
+    """
+    Row count per table, checking all tables at once (independent requests)
+    With fast, only checks that the tables are accessible (counts are None)
+    """
+    check = check_table if fast else count_rows
+    with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+        return dict(zip(tables, executor.map(lambda table: check(client, table), tables)))
+
+
+@functools.lru_cache(maxsize=None)
+def check_folder(folder: Path, patterns: tuple) -> tuple:
+    """
+    Number of files in a folder matching each pattern (one directory pass, no
+    separate exists() check); None if the folder doesn't exist
+    Cached, so processors sharing an export folder only scan it once per process
+    """
+    counts = [0] * len(patterns)
+    try:
+        entries = os.scandir(folder)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    
+    with entries:
+        for entry in entries:
+            for index, pattern in enumerate(patterns):
+                if fnmatch.fnmatchcase(entry.name, pattern) and entry.is_file():
+                    counts[index] += 1
+                    break
+    return tuple(counts)
+
+
+def count_export_files(config: dict) -> dict:
+    """Number of export files in the config's data folder per kind of export; None if the folder doesn't exist"""
+    counts = check_folder(config['folder'], tuple(config['globs'].values()))
+    if counts is None:
+        return None
+    return dict(zip(config['globs'], counts))
+
+
+# ============================================================================
+# Script runner (same checks, printed step by step)
+# ============================================================================
+
+def check_env_variables(output=None) -> bool:
+    """Print which required environment variables are set (to output, stdout by default)"""
+    print("Testing Environment Variables...", file=output)
+    
+    missing = missing_env_variables()
+    for name in ENV_VARIABLES:
+        if name in missing:
+            print(f"  ✗ {name} is NOT set", file=output)
+        else:
+            print(f"  ✓ {name} is set", file=output)
+    
+    return not missing
+
+
+def check_supabase_connection(config: dict, output=None, fast: bool = False) -> bool:
+    """Print whether each of the config's tables is accessible and its row count (skipped with fast)"""
+    print("\nTesting Supabase Connection...", file=output)
+    
+    if missing_env_variables():
+        print("  ✗ Missing Supabase credentials", file=output)
+        return False
+    
+    try:
+        client = get_supabase()
+        
+        row_counts = count_tables(client, config['tables'], fast)
+        for table, row_count in row_counts.items():
+            print(f"\n  Checking {table} table...", file=output)
+            print(f"  ✓ {table} table is accessible", file=output)
+            if fast:
+                print("  ✓ Current rows: skipped (--fast)", file=output)
+            else:
+                print(f"  ✓ Current rows: ≈ {row_count}", file=output)
+        
+        print("\n  ✓ Successfully connected to Supabase", file=output)
+        return True
+    
+    except Exception as e:
+        print(f"  ✗ Supabase connection failed: {e}", file=output)
+        print(f"  → Make sure you've run {config['sql']}", file=output)
+        return False
+
+
+def check_data_folder(config: dict, output=None) -> bool:
+    """Print whether the data folder exists and how many export files it has"""
+    print("\nTesting Data Folder...", file=output)
+    
+    data_folder = config['folder']
+    counts = count_export_files(config)
+    
+    if counts is None:
+        print(f"  ✗ Folder not found: {data_folder}", file=output)
+        return False
+    
+    print(f"  ✓ Data folder exists: {data_folder}", file=output)
+    
+    # Count CSV files
+    for kind, count in counts.items():
+        print(f"  ✓ Found {count} {kind} files", file=output)
+    
+    if not any(counts.values()):
+        print("  ⚠ Warning: No CSV files found", file=output)
+        return False
+    
+    return True
+
+
+def print_next_steps(passed: bool, script: str, sql: str, folder, steps=(), output=None):
+    """Print what to do next: run the processor if every check passed, otherwise what to fix"""
+    print("\nNext steps:", file=output)
+    if passed:
+        print(f"1. Run: python {script}", file=output)
+        for step, text in enumerate(steps, 2):
+            print(f"{step}. {text}", file=output)
+    else:
+        print("1. Fix the issues above", file=output)
+        print("2. Make sure:", file=output)
+        print("   - Your .env file has SUPABASE_URL and SUPABASE_KEY", file=output)
+        print(f"   - You've run {sql} in Supabase", file=output)
+        print(f"   - Your CSV files are in {folder}/", file=output)
+
+
+def run(config: dict, fast: bool = False) -> bool:
+    """Run all checks for one processor and print a summary with next steps (fast: don't count rows)"""
+    print(HR)
+    print(config['title'])
+    print(HR)
+    
+    checks = [
+        check_env_variables,
+        lambda output: check_supabase_connection(config, output, fast),
+        lambda output: check_data_folder(config, output)
+    ]
+    
+    def run_check(check) -> tuple:
+        # Buffer each check's output so the report reads the same as running them in turn
+        output = io.StringIO()
+        return output, check(output)
+    
+    # The checks are independent (network, disk, env), so run them at once;
+    # each check's report is written in one go
+    tests = []
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        for output, passed in executor.map(run_check, checks):
+            sys.stdout.write(output.getvalue())
+            tests.append(passed)
+    
+    # Summary and next steps, also written in one go
+    output = io.StringIO()
+    print("\n" + HR, file=output)
+    print("Test Results Summary", file=output)
+    print(HR, file=output)
+    
+    if all(tests):
+        print(f"✅ All tests passed! You're ready to run {config['script']}", file=output)
+    else:
+        print("❌ Some tests failed. Please fix the issues above before proceeding.", file=output)
+    
+    print_next_steps(all(tests), config['script'], config['sql'], config['folder'], config['next_steps'], output)
+    sys.stdout.write(output.getvalue())
+    
+    return all(tests)
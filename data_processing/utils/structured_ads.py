@@ -0,0 +1,319 @@
+"""
+Shared pipeline for the structured ads processors (Meta Ads, TikTok Ads)
+Subclasses describe their export (table, file prefix, column maps) and add
+their computed fields; reading, cleaning and storing live here
+"""
+
+import io
+import pandas as pd
+from abc import ABC, abstractmethod
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+from pathlib import Path
+from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.env import get_env, get_supabase, get_postgres
+
+# Bytes of CSV parsed, cleaned and stored at a time (roughly 10k rows),
+# so large exports never sit in memory all at once
+CHUNK_BYTES = 4 << 20
+
+# A plain number once thousands separators and % signs are stripped
+NUMBER_PATTERN = r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$'
+
+
+class StructuredAdsProcessor(ABC):
+    """
+    Base class for processors that store one ads export per table row
+    All properties as individual columns (no JSONB)
+    """
+    
+    # Target table and export files (<FILE_PREFIX>YYYY_MM.csv)
+    TABLE_NAME = ''
+    FILE_PREFIX = ''
+    
+    # Report lines above the CSV column header (e.g. a title and date range)
+    HEADER_ROWS = 0
+    
+    # CSV column -> table column
+    DATE_COLUMN = 'Day'
+    TEXT_COLUMNS: Dict[str, str] = {}
+    NUMERIC_COLUMNS: Dict[str, str] = {}
+    
+    # Table columns stored as INTEGER (the rest of the metrics are NUMERIC)
+    INTEGER_COLUMNS: List[str] = []
+    
+    # Used when the export has no value (blank cell or missing column)
+    DEFAULTS: Dict[str, str] = {}
+    
+    # Table columns identifying a record already stored (empty = no duplicate check)
+    # Must match a unique index on the table: batches are upserted on these columns
+    KEY_COLUMNS: Tuple[str, ...] = ()
+    
+    # How many batch inserts run at once, or the get_env() setting that sets it
+    # (read on first use, once .env is loaded)
+    CONCURRENCY = 4
+    CONCURRENCY_SETTING = ''
+    
+    def __init__(self, data_folder: str):
+        self.data_folder = Path(data_folder)
+    
+    @property
+    def concurrency(self) -> int:
+        """How many batch inserts run at once"""
+        if self.CONCURRENCY_SETTING:
+            return get_env()[self.CONCURRENCY_SETTING]
+        return self.CONCURRENCY
+    
+    @property
+    def columns(self) -> List[str]:
+        """Columns parsed from the CSV (anything else in the export is skipped)"""
+        return [self.DATE_COLUMN, *self.TEXT_COLUMNS, *self.NUMERIC_COLUMNS]
+    
+    def read_csv_file(self, file_path: Path) -> pacsv.CSVStreamingReader:
+        """Read CSV file as a stream of Arrow record batches (only the columns we use)"""
+        try:
+            # Everything is read as text: numbers like "1,234" and "2.5%" are cleaned per
+            # column later, and columns missing from an export come back empty
+            return pacsv.open_csv(
+                file_path,
+                read_options=pacsv.ReadOptions(skip_rows=self.HEADER_ROWS, block_size=CHUNK_BYTES),
+                convert_options=pacsv.ConvertOptions(
+                    include_columns=self.columns,
+                    include_missing_columns=True,
+                    column_types={name: pa.string() for name in self.columns},
+                    strings_can_be_null=True
+                )
+            )
+        except Exception as e:
+            print(f"Error reading {file_path}: {e}")
+            return None
+    
+    def get_column(self, df: pd.DataFrame, column: str, default='') -> pd.Series:
+        """Get a column, or a constant column if the export doesn't have it"""
+        if column in df.columns:
+            return df[column]
+        return pd.Series(default, index=df.index)
+    
+    def clean_numeric_column(self, series: pd.Series) -> pd.Series:
+        """Clean a whole numeric column at once (thousands separators, % signs, blanks -> 0)"""
+        # Already numeric - nothing to strip
+        if pd.api.types.is_numeric_dtype(series):
+            return series.fillna(0).astype(float)
+        
+        # Strip and parse with Arrow compute kernels instead of a Python call per cell;
+        # anything that isn't a number becomes null (then 0), like to_numeric(errors='coerce')
+        text = pa.array(series.astype('string[pyarrow]').array)
+        text = pc.utf8_trim_whitespace(pc.replace_substring(pc.replace_substring(text, ',', ''), '%', ''))
+        numbers = pc.cast(pc.if_else(pc.match_substring_regex(text, NUMBER_PATTERN), text, None), pa.float64())
+        return pd.Series(numbers.to_numpy(zero_copy_only=False), index=series.index).fillna(0)
+    
+    def parse_date_column(self, series: pd.Series) -> pd.Series:
+        """Parse a whole date column to YYYY-MM-DD strings (None if unparseable)"""
+        return pd.to_datetime(series, format='%Y-%m-%d', errors='coerce').dt.strftime('%Y-%m-%d')
+    
+    def to_records(self, data: pd.DataFrame) -> List[Dict]:
+        """Convert to insert rows with plain Python values (NaN -> None)"""
+        return data.astype(object).where(data.notna(), None).to_dict(orient='records')
+    
+    def source_fields(self, file_path: Path) -> Dict[str, str]:
+        """Columns with the same value for every row of a file (file name and period)"""
+        period = file_path.name.replace(self.FILE_PREFIX, "").replace(".csv", "")
+        year, month = period.split("_")
+        return {'file_name': file_path.name, 'period': period, 'year': year, 'month': month}
+    
+    def prepare_dataframe(self, df: pd.DataFrame, source: Dict[str, str]) -> pd.DataFrame:
+        """Clean a whole DataFrame into structured columns - all properties preserved"""
+        
+        data = pd.DataFrame({
+            # Date
+            'day': self.parse_date_column(self.get_column(df, self.DATE_COLUMN)),
+            
+            # Source information
+            **source
+        }, index=df.index)
+        
+        # Campaign details (blank cells become the default, usually an empty string)
+        for source, column in self.TEXT_COLUMNS.items():
+            default = self.DEFAULTS.get(source, '')
+            data[column] = self.get_column(df, source, default).fillna(default)
+        
+        # Metrics - all numeric columns cleaned at once
+        for source, column in self.NUMERIC_COLUMNS.items():
+            data[column] = self.clean_numeric_column(self.get_column(df, source, 0))
+        for column in self.INTEGER_COLUMNS:
+            data[column] = data[column].astype(int)
+        
+        # Computed fields for this export
+        self.add_fields(data)
+        
+        return data
+    
+    @abstractmethod
+    def add_fields(self, data: pd.DataFrame):
+        """Add the export's computed fields (content is generated by Postgres)"""
+    
+    def get_existing_records(self, file_name: str) -> set:
+        """Get the keys of all records already stored for a file to avoid duplicates"""
+        if not self.KEY_COLUMNS:
+            return set()
+        
+        try:
+            print(f"  Checking existing records for {file_name}...")
+            result = get_supabase().table(self.TABLE_NAME)\
+                .select(','.join(self.KEY_COLUMNS))\
+                .eq('file_name', file_name)\
+                .execute()
+            
+            # Create a set of tuples for fast lookup
+            existing = {tuple(row[column] for column in self.KEY_COLUMNS) for row in result.data}
+            print(f"  Found {len(existing)} existing records")
+            return existing
+        except Exception as e:
+            print(f"  Warning: Could not check existing records: {e}")
+            return set()
+    
+    def write_rows(self, rows):
+        """
+        Insert one record or a list of records; with KEY_COLUMNS, records already
+        stored are left as they are (ON CONFLICT DO NOTHING) instead of failing
+        """
+        table = get_supabase().table(self.TABLE_NAME)
+        if self.KEY_COLUMNS:
+            return table.upsert(rows, on_conflict=','.join(self.KEY_COLUMNS), ignore_duplicates=True).execute()
+        return table.insert(rows).execute()
+    
+    def store_batch(self, batch: list) -> tuple:
+        """
+        Store a batch of records with one request (duplicates count as stored)
+        If the batch is rejected, fall back to row-by-row inserts so only
+        the bad records are lost
+        """
+        try:
+            self.write_rows(batch)
+            return len(batch), 0
+        except Exception as e:
+            print(f"  Error storing batch, retrying row by row: {e}")
+        
+        successful = 0
+        failed = 0
+        for record in batch:
+            try:
+                self.write_rows(record)
+                successful += 1
+            except Exception as e:
+                print(f"  Error storing record: {e}")
+                failed += 1
+        return successful, failed
+    
+    def copy_rows(self, rows: list) -> bool:
+        """
+        Load all rows with a single Postgres COPY (much faster than INSERT)
+        COPY is all-or-nothing, so on failure nothing is stored and the caller
+        can fall back to the REST inserts
+        """
+        columns = list(rows[0].keys())
+        buffer = io.StringIO()
+        pd.DataFrame(rows, columns=columns).to_csv(buffer, index=False, header=False, na_rep='\\N')
+        buffer.seek(0)
+        
+        try:
+            # One connection for every chunk and file (no handshake per COPY)
+            conn = get_postgres()
+            with conn, conn.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY {self.TABLE_NAME} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                    buffer
+                )
+            return True
+        except Exception as e:
+            print(f"  Error copying rows, falling back to inserts: {e}")
+            # Reconnect next time in case the connection itself broke
+            get_postgres.cache_clear()
+            return False
+    
+    def store_records(self, records: list, batch_size: int) -> tuple:
+        """
+        Store records with one COPY when DATABASE_URL is set (optional direct
+        Postgres connection, needs psycopg2), otherwise with concurrent batch inserts
+        """
+        if get_env()['DATABASE_URL'] and records and self.copy_rows(records):
+            return len(records), 0
+        
+        successful = 0
+        failed = 0
+        
+        batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for batch_success, batch_failed in executor.map(self.store_batch, batches):
+                successful += batch_success
+                failed += batch_failed
+        
+        return successful, failed
+    
+    def process_file(self, file_path: Path, batch_size: int = 500):
+        """Process one export file chunk by chunk with batch inserts for speed"""
+        print(f"\n{'='*60}")
+        print(f"Processing: {file_path.name}")
+        print(f"{'='*60}")
+        
+        reader = self.read_csv_file(file_path)
+        
+        if reader is None:
+            print("  ✗ Failed to read file")
+            return 0, 0, 0
+        
+        print(f"  Using batch processing (batch size: {batch_size})")
+        
+        # Source information (once per file, not per chunk)
+        source = self.source_fields(file_path)
+        
+        # Get existing records for this file (one query instead of many)
+        existing_records = self.get_existing_records(file_path.name)
+        
+        successful = 0
+        failed = 0
+        skipped = 0
+        rows = 0
+        error = None
+        
+        with reader:
+            try:
+                for record_batch in reader:
+                    # Text stays Arrow-backed (string[pyarrow]) instead of becoming Python str objects
+                    df = record_batch.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+                    rows += len(df)
+                    
+                    # Clean every column at once
+                    records = self.to_records(self.prepare_dataframe(df, source))
+                    
+                    # Skip records that already exist (fast set lookup)
+                    if existing_records:
+                        new_records = [
+                            data for data in records
+                            if tuple(data[column] for column in self.KEY_COLUMNS) not in existing_records
+                        ]
+                        skipped += len(records) - len(new_records)
+                        records = new_records
+                    
+                    chunk_success, chunk_failed = self.store_records(records, batch_size)
+                    successful += chunk_success
+                    failed += chunk_failed
+                    print(f"  Processed {rows} rows... "
+                          f"({successful} stored, {skipped} skipped, {failed} failed)")
+            except Exception as e:
+                # A bad chunk later in the file: keep the batches already stored
+                # and move on to the next file
+                error = e
+        
+        if error is not None:
+            # Rows read but not stored count as failed (the rest of the file is skipped)
+            failed += rows - successful - failed - skipped
+            print(f"\n  ✗ Error reading {file_path.name} after {rows} rows, rest of the file skipped: {error}")
+            print(f"  ✗ Partially failed: {successful} successful, {failed} failed, {skipped} skipped")
+            return successful, failed, skipped
+        
+        print(f"\n  ✓ Completed: {successful} successful, {failed} failed, {skipped} skipped (already exist)")
+        return successful, failed, skipped
@@ -4,12 +4,25 @@ Test script for n8n Marketing Analytics AI Assistant webhook
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import io
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Configuration
 N8N_WEBHOOK_URL = "http://localhost:5678/webhook/marketing-chat"  # Change this to your n8n webhook URL
+HEADERS = {"Content-Type": "application/json"}
+
+# One session for every question, so keep-alive connections to n8n are reused
+# instead of opening a new TCP (and TLS) connection per request
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# Questions sent at once by run_all_tests (one pooled connection each)
+TEST_CONCURRENCY = 8
 
 # Test questions
 TEST_QUESTIONS = [
@@ -24,69 +37,73 @@ TEST_QUESTIONS = [
 ]
 
 
-def test_webhook(question: str, webhook_url: str = N8N_WEBHOOK_URL) -> dict:
+def test_webhook(question: str, webhook_url: str = N8N_WEBHOOK_URL, output=None) -> dict:
     """
     Send a question to the n8n webhook and return the response
+    Everything is printed to output (stdout by default)
     """
-    print(f"\n{'='*80}")
-    print(f"🔍 Question: {question}")
-    print(f"{'='*80}")
+    if output is None:
+        output = sys.stdout
+    
+    print(f"\n{'='*80}", file=output)
+    print(f"🔍 Question: {question}", file=output)
+    print(f"{'='*80}", file=output)
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             webhook_url,
             json={"question": question},
-            headers={"Content-Type": "application/json"},
+            headers=HEADERS,
             timeout=60  # 60 second timeout
         )
         
-        print(f"📡 Status Code: {response.status_code}")
+        print(f"📡 Status Code: {response.status_code}", file=output)
         
         if response.status_code == 200:
             data = response.json()
             
             if data.get('success'):
-                print(f"\n✅ Success!")
-                print(f"\n📊 Answer:")
-                print("-" * 80)
+                print(f"\n✅ Success!", file=output)
+                print(f"\n📊 Answer:", file=output)
+                print("-" * 80, file=output)
                 
                 # Extract answer (handle both string and object)
                 answer = data.get('answer', '')
                 if isinstance(answer, dict):
                     answer = json.dumps(answer, indent=2)
                 
-                print(answer)
-                print("-" * 80)
+                print(answer, file=output)
+                print("-" * 80, file=output)
                 
                 # Show metadata if available
                 if 'metadata' in data:
                     metadata = data['metadata']
-                    print(f"\n📈 Metadata:")
-                    print(f"  • Rows analyzed: {metadata.get('rows_analyzed', 'N/A')}")
-                    print(f"  • Timestamp: {metadata.get('timestamp', 'N/A')}")
+                    print(f"\n📈 Metadata:", file=output)
+                    print(f"  • Rows analyzed: {metadata.get('rows_analyzed', 'N/A')}", file=output)
+                    print(f"  • Timestamp: {metadata.get('timestamp', 'N/A')}", file=output)
                 
                 return data
             else:
-                print(f"\n❌ Error: {data.get('error', 'Unknown error')}")
+                print(f"\n❌ Error: {data.get('error', 'Unknown error')}", file=output)
                 return None
                 
         else:
-            print(f"\n❌ HTTP Error {response.status_code}")
-            print(f"Response: {response.text}")
+            print(f"\n❌ HTTP Error {response.status_code}", file=output)
+            print(f"Response: {response.text}", file=output)
             return None
             
     except requests.exceptions.Timeout:
-        print(f"\n⏱️ Request timed out (>60s)")
+        print(f"\n⏱️ Request timed out (>60s)", file=output)
         return None
     except requests.exceptions.ConnectionError:
-        print(f"\n🔌 Connection Error: Cannot reach {webhook_url}")
-        print(f"\nMake sure:")
-        print(f"  • n8n is running")
-        print(f"  • The workflow is activated")
-        print(f"  • The webhook URL is correct")
+        print(f"\n🔌 Connection Error: Cannot reach {webhook_url}", file=output)
+        print(f"\nMake sure:", file=output)
+        print(f"  • n8n is running", file=output)
+        print(f"  • The workflow is activated", file=output)
+        print(f"  • The webhook URL is correct", file=output)
         return None
     except Exception as e:
-        print(f"\n❌ Error: {str(e)}")
+        print(f"\n❌ Error: {str(e)}", file=output)
         return None
 
 
@@ -101,14 +118,24 @@ def run_all_tests(webhook_url: str = N8N_WEBHOOK_URL):
     print(f"Test Questions: {len(TEST_QUESTIONS)}")
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
+    def run_test(question: str) -> tuple:
+        # Buffer each test's output so parallel tests don't interleave
+        output = io.StringIO()
+        result = test_webhook(question, webhook_url, output)
+        return output.getvalue(), result
+    
+    # The questions are independent, so send them in parallel and
+    # print each test's output in order as it completes
     results = []
-    for i, question in enumerate(TEST_QUESTIONS, 1):
-        print(f"\n\n📝 Test {i}/{len(TEST_QUESTIONS)}")
-        result = test_webhook(question, webhook_url)
-        results.append({
-            'question': question,
-            'success': result is not None and result.get('success', False)
-        })
+    with ThreadPoolExecutor(max_workers=TEST_CONCURRENCY) as executor:
+        tests = zip(TEST_QUESTIONS, executor.map(run_test, TEST_QUESTIONS))
+        for i, (question, (output, result)) in enumerate(tests, 1):
+            print(f"\n\n📝 Test {i}/{len(TEST_QUESTIONS)}")
+            print(output, end="")
+            results.append({
+                'question': question,
+                'success': result is not None and result.get('success', False)
+            })
     
     # Summary
     print("\n\n" + "="*80)